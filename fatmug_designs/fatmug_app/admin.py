@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Vendor, PurchaseOrder, HistoricalPerformance
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, ChangeEvent
 
 class VendorAdmin(admin.ModelAdmin):
     list_display = ('name', 'vendor_code', 'on_time_delivery_rate', 'quality_rating_avg')
@@ -21,3 +21,9 @@ class HistoricalPerformanceAdmin(admin.ModelAdmin):
     list_filter = ('vendor',)
 
 admin.site.register(HistoricalPerformance, HistoricalPerformanceAdmin)
+
+class ChangeEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'entity', 'object_id', 'action', 'created_at')
+    list_filter = ('entity', 'action')
+
+admin.site.register(ChangeEvent, ChangeEventAdmin)
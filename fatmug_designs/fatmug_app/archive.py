@@ -0,0 +1,106 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+
+from .change_feed import record_deletions
+from .models import PurchaseOrder, HistoricalPerformance, ArchivedPurchaseOrder, VendorArchiveAggregate
+from .track_performance import COUNTER_FIELDS, aggregate_purchase_orders
+
+
+def compress_purchase_order(purchase_order):
+    """
+    Serialize all concrete fields of a purchase order to zlib-compressed JSON.
+
+    Args:
+        purchase_order (PurchaseOrder): The purchase order to compress.
+
+    Returns:
+        bytes: The compressed purchase order.
+    """
+    data = {field.attname: field.value_from_object(purchase_order) for field in purchase_order._meta.concrete_fields}
+    return zlib.compress(json.dumps(data, cls=DjangoJSONEncoder).encode())
+
+
+def read_archived_purchase_order(archived):
+    """
+    Decompress the fields of an archived purchase order.
+
+    Args:
+        archived (ArchivedPurchaseOrder): The archived purchase order.
+
+    Returns:
+        dict: The purchase order fields as stored at archival time.
+    """
+    return json.loads(zlib.decompress(archived.data))
+
+
+def archive_purchase_order_batch(cutoff, batch_size):
+    """
+    Move one batch of completed purchase orders placed before a cutoff into the archive table.
+
+    The counters of the archived orders are carried forward into VendorArchiveAggregate in the same
+    transaction, so the performance metrics and purchase order counters of their vendors stay unchanged.
+    A "deleted" change event is recorded for each archived order, which leaves the API.
+
+    Args:
+        cutoff (datetime): Only orders placed before this date are archived.
+        batch_size (int): Maximum number of purchase orders archived in the batch.
+
+    Returns:
+        int: The number of archived purchase orders.
+    """
+    with transaction.atomic():
+        batch = list(PurchaseOrder.objects.select_for_update(skip_locked=True)
+                     .filter(status="complete", order_date__lt=cutoff).order_by("id")[:batch_size])
+        if not batch:
+            return 0
+
+        batch_ids = [purchase_order.id for purchase_order in batch]
+        counters = aggregate_purchase_orders(PurchaseOrder.objects.filter(id__in=batch_ids))
+
+        for vendor_id, vendor_counters in counters.items():
+            VendorArchiveAggregate.objects.get_or_create(vendor_id=vendor_id)
+            VendorArchiveAggregate.objects.filter(vendor_id=vendor_id).update(
+                **{field: F(field) + vendor_counters[field] for field in COUNTER_FIELDS})
+
+        ArchivedPurchaseOrder.objects.bulk_create([
+            ArchivedPurchaseOrder(po_id=purchase_order.id, vendor_id=purchase_order.vendor_id,
+                                  order_date=purchase_order.order_date, data=compress_purchase_order(purchase_order))
+            for purchase_order in batch
+        ])
+        PurchaseOrder.objects.filter(id__in=batch_ids).delete()
+        record_deletions(PurchaseOrder, batch_ids, "archived")
+        return len(batch)
+
+
+def purge_vendor(vendor, batch_size):
+    """
+    Permanently delete a soft-deleted vendor, removing its dependent rows in batches.
+
+    Each batch is deleted in its own short transaction instead of one cascading delete. A "deleted" change
+    event is recorded for each purchase order in the transaction deleting it.
+
+    Args:
+        vendor (Vendor): The vendor to purge.
+        batch_size (int): Maximum number of rows deleted per statement.
+
+    Returns:
+        int: The number of deleted dependent rows.
+    """
+    deleted = 0
+    for model in (PurchaseOrder, HistoricalPerformance, ArchivedPurchaseOrder):
+        while True:
+            batch_ids = list(model.objects.filter(vendor_id=vendor.id).values_list("id", flat=True)[:batch_size])
+            if not batch_ids:
+                break
+            with transaction.atomic():
+                model.objects.filter(id__in=batch_ids).delete()
+                if model is PurchaseOrder:
+                    record_deletions(PurchaseOrder, batch_ids, "vendor_purged")
+            deleted += len(batch_ids)
+
+    vendor.delete()
+    return deleted
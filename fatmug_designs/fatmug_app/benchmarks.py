@@ -0,0 +1,35 @@
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Vendor, PurchaseOrder
+
+
+def create_benchmark_rows(rows, vendor_count):
+    """
+    Create completed purchase orders spread round-robin over new vendors for the benchmark commands.
+
+    Callers remove the rows afterwards, by rolling back the transaction they were created in or, when other
+    processes must read them, by deleting them.
+
+    Args:
+        rows (int): Number of purchase orders to create.
+        vendor_count (int): Number of vendors owning the purchase orders.
+
+    Returns:
+        list: The created vendors.
+    """
+    vendors = Vendor.objects.bulk_create([
+        Vendor(name=f"Benchmark vendor {i}", contact_details="benchmark", address="benchmark", vendor_code="000000")
+        for i in range(vendor_count)
+    ])
+    now = timezone.now()
+    PurchaseOrder.objects.bulk_create([
+        PurchaseOrder(po_number=str(i).zfill(6), vendor=vendors[i % vendor_count],
+                      order_date=now - timedelta(days=10), delivery_date=now - timedelta(days=random.randint(0, 20)),
+                      items=[{"name": "item", "quantity": 2}], quantity=2, status="complete",
+                      quality_rating=random.randint(1, 5), acknowledgment_date=now - timedelta(days=5))
+        for i in range(rows)
+    ], batch_size=1000)
+    return vendors
@@ -0,0 +1,96 @@
+import time
+from datetime import timedelta
+
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .models import ChangeEvent
+
+# Seconds between two polls of the change log while a long-poll request waits for new events.
+POLL_INTERVAL = 0.5
+
+# Sequence numbers are allocated when an event is inserted, but transactions commit in any order. A gap in the
+# sequence is waited for until the event after it is this old; an older gap is a rolled-back transaction.
+GAP_TIMEOUT = timedelta(seconds=10)
+
+
+def record_change(instance, action):
+    """
+    Append a change event for a vendor or purchase order to the change log.
+
+    The event is written on the current database connection, so calling this inside the transaction
+    performing the write commits or rolls back both together.
+
+    Args:
+        instance (Model): The created, updated or deleted object.
+        action (str): One of "created", "updated" or "deleted".
+
+    Returns:
+        ChangeEvent: The recorded change event.
+    """
+    payload = model_to_dict(instance) if action != "deleted" else {"id": instance.pk}
+    return ChangeEvent.objects.create(entity=instance._meta.model_name, object_id=instance.pk,
+                                      action=action, payload=payload)
+
+
+def record_deletions(model, object_ids, reason):
+    """
+    Append "deleted" change events for objects removed in bulk, outside of the API.
+
+    Args:
+        model (Model): The model of the removed objects.
+        object_ids (list): Primary keys of the removed objects.
+        reason (str): Why the objects were removed, e.g. "archived" or "vendor_purged".
+
+    Returns:
+        list: The recorded change events.
+    """
+    return ChangeEvent.objects.bulk_create([
+        ChangeEvent(entity=model._meta.model_name, object_id=object_id, action="deleted",
+                    payload={"id": object_id, "reason": reason})
+        for object_id in object_ids
+    ])
+
+
+def visible_changes(events, since):
+    """
+    Keep the events that can be consumed without skipping a change that is still being committed.
+
+    The events are cut at the first gap in the sequence that is younger than GAP_TIMEOUT, because the missing
+    events may belong to transactions that have not committed yet. A consumer advancing its cursor past them
+    would never see them.
+
+    Args:
+        events (list): Change events recorded after the sequence number, ordered by sequence number.
+        since (int): Sequence number of the last event already consumed.
+
+    Returns:
+        list: The leading events that are safe to consume.
+    """
+    cutoff = timezone.now() - GAP_TIMEOUT
+    expected = since + 1
+    for index, event in enumerate(events):
+        if event.id != expected and event.created_at > cutoff:
+            return events[:index]
+        expected = event.id + 1
+    return events
+
+
+def read_changes(since, limit, wait=0):
+    """
+    Read the change events recorded after a sequence number.
+
+    Args:
+        since (int): Sequence number of the last event already consumed.
+        limit (int): Maximum number of events to return.
+        wait (float): Seconds to wait for new events when none are available yet.
+
+    Returns:
+        list: The change events ordered by sequence number.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        events = visible_changes(list(ChangeEvent.objects.filter(id__gt=since).order_by("id")[:limit]), since)
+        if events or time.monotonic() >= deadline:
+            return events
+        time.sleep(POLL_INTERVAL)
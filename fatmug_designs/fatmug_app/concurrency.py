@@ -0,0 +1,117 @@
+from django.db.models import F
+
+IF_MATCH_HEADER = "If-Match"
+
+
+class VersionConflict(Exception):
+    """
+    Raised when an object was modified by another request since the request read it.
+
+    Attributes:
+        status_code (int): The HTTP status of the error response.
+    """
+
+    status_code = 409
+
+
+class PreconditionFailed(VersionConflict):
+    """
+    Raised when an object no longer has the version the client expects to update (If-Match or expected_version).
+    """
+
+    status_code = 412
+
+
+def next_version():
+    """
+    Build the expression incrementing the version of an object in an UPDATE statement.
+
+    Writes bypassing update_changed_fields, such as the F-expression updates of the purchase order counters and
+    the performance metrics of vendors, increment the version with it, so that the ETag of an object changes
+    whenever its representation does.
+
+    Returns:
+        CombinedExpression: The version plus one.
+    """
+    return F("version") + 1
+
+
+def get_etag(instance):
+    """
+    Build the ETag of a versioned object.
+
+    Args:
+        instance (Model): A Vendor or PurchaseOrder.
+
+    Returns:
+        str: The quoted version of the object.
+    """
+    return f'"{instance.version}"'
+
+
+def get_expected_version(request):
+    """
+    Read the version a client expects to update, from the If-Match header or the "expected_version" field.
+
+    Weak ETags are accepted, since compressed responses carry a weakened ETag.
+
+    Args:
+        request (Request): The incoming write request.
+
+    Returns:
+        int: The expected version, or None if the client did not send one or sent If-Match: *.
+
+    Raises:
+        ValueError: If the version is not an integer.
+    """
+    if_match = request.headers.get(IF_MATCH_HEADER)
+    if if_match is not None:
+        if_match = if_match.strip().removeprefix("W/").strip('"')
+        return None if if_match == "*" else int(if_match)
+
+    expected_version = request.data.get("expected_version") if hasattr(request.data, "get") else None
+    return None if expected_version is None else int(expected_version)
+
+
+def check_expected_version(instance, expected_version):
+    """
+    Check that a client is updating the version of an object it expects.
+
+    Args:
+        instance (Model): The object as read by the request.
+        expected_version (int): The version expected by the client, or None to skip the check.
+
+    Raises:
+        PreconditionFailed: If the object has a different version.
+    """
+    if expected_version is not None and instance.version != expected_version:
+        raise PreconditionFailed(f"Expected version {expected_version}, but the current version is {instance.version}")
+
+
+def update_changed_fields(instance, fields, original=None):
+    """
+    Write the given fields of an object with a conditional UPDATE ... WHERE version = <version read>.
+
+    Only the given fields are written, and the version is incremented in the same statement, so concurrent
+    writers of the same object cannot overwrite each other without a lock being held between read and write.
+
+    Args:
+        instance (Model): The object as read by the request, with the new field values set.
+        fields (iterable): Names of the changed fields.
+        original (dict): The values of the changed fields as read by the request. When given, the UPDATE is
+            conditional on these fields instead of the version, so writes of other fields in between, such as
+            the counter and metric updates of vendors, do not conflict. Must be called inside a transaction.
+
+    Raises:
+        VersionConflict: If the object was modified since it was read.
+    """
+    values = {field: getattr(instance, field) for field in fields}
+    objects = type(instance)._base_manager.filter(pk=instance.pk)
+    condition = {"version": instance.version} if original is None else original
+    if not objects.filter(**condition).update(**values, version=next_version()):
+        raise VersionConflict("The object was modified by another request, retry with its current version")
+    if original is None:
+        instance.version += 1
+    else:
+        # Other writes may have incremented the version since the read; the row stays locked until commit.
+        instance.version = objects.values_list("version", flat=True).get()
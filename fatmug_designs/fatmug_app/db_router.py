@@ -0,0 +1,69 @@
+import contextvars
+import functools
+
+from django.conf import settings
+
+# Set while a view that tolerates replica lag is reading.
+_replica_reads = contextvars.ContextVar("replica_reads", default=False)
+
+
+def wants_primary(request):
+    """
+    Tell whether a request must read from the primary database to see the client's own recent writes.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        bool: True when the sticky-primary cookie or header is present.
+    """
+    return bool(request.COOKIES.get(settings.READ_PRIMARY_COOKIE) or request.headers.get("X-Read-Primary"))
+
+
+def read_from_replica(view_method):
+    """
+    Route the database reads of a view method to the read replica.
+
+    Clients that wrote recently (sticky-primary cookie) or ask for it explicitly (X-Read-Primary header)
+    keep reading from the primary database so they see their own writes.
+
+    Args:
+        view_method (function): The read-only view method.
+
+    Returns:
+        function: The wrapped view method.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if wants_primary(request):
+            return view_method(self, request, *args, **kwargs)
+
+        token = _replica_reads.set(True)
+        try:
+            return view_method(self, request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    ReplicaRouter sends the reads of views decorated with read_from_replica to READ_REPLICA_DATABASE.
+
+    Every other read and all writes go to the default database. Without a configured replica the
+    router has no effect.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.READ_REPLICA_DATABASE:
+            return settings.READ_REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary.
+        return True
@@ -0,0 +1,160 @@
+import numpy as np
+
+from .models import PurchaseOrder, VendorArchiveAggregate
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def load_delivery_history(purchase_orders):
+    """
+    Load the delivery history of purchase orders into columnar NumPy arrays.
+
+    Only acknowledged purchase orders are delivered, so only they take part in the forecast. Rows are
+    sorted by vendor and then by order date.
+
+    Args:
+        purchase_orders (QuerySet): The purchase orders to load.
+
+    Returns:
+        tuple: Arrays of vendor IDs, on-time flags (0 or 1) and lead times in days.
+    """
+    rows = purchase_orders.filter(acknowledgment_date__isnull=False).order_by("vendor_id", "order_date", "id")
+    rows = list(rows.values_list("vendor_id", "order_date", "delivery_date", "acknowledgment_date"))
+
+    vendor_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    timestamps = np.array([(order_date.timestamp(), delivery_date.timestamp(), acknowledgment_date.timestamp())
+                           for _, order_date, delivery_date, acknowledgment_date in rows],
+                          dtype=np.float64).reshape(-1, 3)
+    on_time = (timestamps[:, 2] <= timestamps[:, 1]).astype(np.float64)
+    lead_time = (timestamps[:, 2] - timestamps[:, 0]) / SECONDS_PER_DAY
+    return vendor_ids, on_time, lead_time
+
+
+def load_archived_history(archive_aggregates):
+    """
+    Load the delivery counters carried forward from the archived purchase orders of vendors.
+
+    Archived purchase orders are completed, hence delivered, and older than the live ones of their vendor.
+
+    Args:
+        archive_aggregates (QuerySet): The VendorArchiveAggregate rows to load.
+
+    Returns:
+        dict: The number of archived deliveries, on-time deliveries and the sum of their lead times in days,
+            keyed by vendor ID.
+    """
+    rows = archive_aggregates.filter(response_time_count__gt=0).values_list(
+        "vendor_id", "response_time_count", "on_time_orders", "response_time_sum")
+    return {vendor_id: (count, on_time, lead_time_sum / SECONDS_PER_DAY)
+            for vendor_id, count, on_time, lead_time_sum in rows}
+
+
+def compute_delivery_forecasts(vendor_ids, on_time, lead_time, window, halflife, archived=None):
+    """
+    Compute rolling and exponentially weighted delivery statistics of every vendor at once.
+
+    The arrays must be grouped by vendor and sorted chronologically within each vendor. Each vendor's
+    exponentially weighted mean gives a weight of 0.5 ** (k / halflife) to its k-th most recent delivery.
+    Archived deliveries only survive as per-vendor totals, so they count as a block of deliveries older than
+    the live ones, each with the average on-time rate and lead time of the block.
+
+    Args:
+        vendor_ids (ndarray): Vendor ID of each delivery.
+        on_time (ndarray): 1.0 for on-time deliveries, 0.0 otherwise.
+        lead_time (ndarray): Lead time of each delivery in days.
+        window (int): Number of most recent deliveries in the rolling statistics.
+        halflife (float): Number of deliveries after which the weight of a delivery halves.
+        archived (dict): Archived delivery counters keyed by vendor ID, as returned by load_archived_history.
+
+    Returns:
+        dict: A mapping of vendor ID to its forecast fields.
+    """
+    stats = _live_statistics(vendor_ids, on_time, lead_time, window, halflife)
+
+    # Weight of the k-th most recent delivery is decay ** k.
+    decay = 0.5 ** (1 / halflife)
+    for vendor_id, (count, on_time_count, lead_time_sum) in (archived or {}).items():
+        vendor_stats = stats.setdefault(vendor_id, [0.0, 0.0, 0.0, 0.0, 0.0, 0, 0])
+        weight_sum, ewm_on_time, ewm_lead_time, rolling_on_time, rolling_lead_time, window_size, live = vendor_stats
+        on_time_mean, lead_time_mean = on_time_count / count, lead_time_sum / count
+
+        # Total weight of the deliveries aged live .. live + count - 1, a geometric series.
+        block_weight = decay ** live * (1 - decay ** count) / (1 - decay)
+        # The rolling window is completed with archived deliveries when the live ones do not fill it.
+        filler = min(window - window_size, count)
+        vendor_stats[:] = [
+            weight_sum + block_weight,
+            ewm_on_time + block_weight * on_time_mean,
+            ewm_lead_time + block_weight * lead_time_mean,
+            rolling_on_time + filler * on_time_mean,
+            rolling_lead_time + filler * lead_time_mean,
+            window_size + filler,
+            live + count,
+        ]
+
+    return {
+        int(vendor_id): {
+            "on_time_probability": round(ewm_on_time / weight_sum, 4),
+            "expected_lead_time": round(ewm_lead_time / weight_sum, 2),
+            "rolling_on_time_rate": round(rolling_on_time / window_size, 4),
+            "rolling_lead_time": round(rolling_lead_time / window_size, 2),
+            "sample_size": int(sample_size),
+        }
+        for vendor_id, (weight_sum, ewm_on_time, ewm_lead_time, rolling_on_time, rolling_lead_time, window_size,
+                        sample_size) in stats.items()
+    }
+
+
+def _live_statistics(vendor_ids, on_time, lead_time, window, halflife):
+    """
+    Compute the weighted and rolling sums of the live deliveries of every vendor with vectorized operations.
+
+    Returns:
+        dict: The weight sum, the weighted on-time and lead time sums, the rolling on-time and lead time sums,
+            the rolling window size and the number of deliveries, keyed by vendor ID.
+    """
+    if not len(vendor_ids):
+        return {}
+
+    unique_ids, starts, counts = np.unique(vendor_ids, return_index=True, return_counts=True)
+    ends = starts + counts
+
+    # Position of each delivery counted from the most recent one of its vendor.
+    age = np.repeat(ends, counts) - 1 - np.arange(len(vendor_ids))
+    weights = np.power(0.5, age / halflife)
+    weight_sums = np.add.reduceat(weights, starts)
+    ewm_on_time = np.add.reduceat(weights * on_time, starts)
+    ewm_lead_time = np.add.reduceat(weights * lead_time, starts)
+
+    # Rolling means over the last `window` deliveries from prefix sums.
+    window_starts = np.maximum(starts, ends - window)
+    window_sizes = ends - window_starts
+    on_time_prefix = np.concatenate(([0.0], np.cumsum(on_time)))
+    lead_time_prefix = np.concatenate(([0.0], np.cumsum(lead_time)))
+    rolling_on_time = on_time_prefix[ends] - on_time_prefix[window_starts]
+    rolling_lead_time = lead_time_prefix[ends] - lead_time_prefix[window_starts]
+
+    columns = zip(weight_sums.tolist(), ewm_on_time.tolist(), ewm_lead_time.tolist(), rolling_on_time.tolist(),
+                  rolling_lead_time.tolist(), window_sizes.tolist(), counts.tolist())
+    return {vendor_id: list(column) for vendor_id, column in zip(unique_ids.tolist(), columns)}
+
+
+def forecast_vendor_range(first_vendor_id, last_vendor_id, window, halflife):
+    """
+    Compute the delivery forecasts of the active vendors in an ID range, from their live and archived orders.
+
+    Args:
+        first_vendor_id (int): The first vendor ID of the range.
+        last_vendor_id (int): The last vendor ID of the range, inclusive.
+        window (int): Number of most recent deliveries in the rolling statistics.
+        halflife (float): Number of deliveries after which the weight of a delivery halves.
+
+    Returns:
+        dict: A mapping of vendor ID to its forecast fields.
+    """
+    # Vendors deleted and pending purge keep their purchase orders until purged, skip them.
+    vendor_range = {"vendor_id__gte": first_vendor_id, "vendor_id__lte": last_vendor_id,
+                    "vendor__deleted_at__isnull": True}
+    archived = load_archived_history(VendorArchiveAggregate.objects.filter(**vendor_range))
+    return compute_delivery_forecasts(*load_delivery_history(PurchaseOrder.objects.filter(**vendor_range)),
+                                      window=window, halflife=halflife, archived=archived)
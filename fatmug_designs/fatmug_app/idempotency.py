@@ -0,0 +1,115 @@
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Request headers that change the outcome of a write, fingerprinted with the payload.
+FINGERPRINTED_HEADERS = ("If-Match",)
+
+
+def _request_hash(request):
+    """
+    Fingerprint a request so a key reused with a different request can be rejected.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        str: Hex SHA-256 digest of the method, path, fingerprinted headers and payload.
+    """
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    headers = json.dumps([request.headers.get(header) for header in FINGERPRINTED_HEADERS])
+    return hashlib.sha256(f"{request.method} {request.path}\n{headers}\n{payload}".encode()).hexdigest()
+
+
+def _replay(request, key, request_hash):
+    """
+    Answer a request whose Idempotency-Key is already taken.
+
+    Args:
+        request (Request): The incoming request.
+        key (str): The Idempotency-Key of the request.
+        request_hash (str): The fingerprint of the request.
+
+    Returns:
+        Response: The stored response, or an error if the key belongs to another request or is in progress.
+    """
+    record = IdempotencyKey.objects.filter(user_id=request.user.id, key=key).first()
+    if record is not None and record.request_hash != request_hash:
+        return Response({"error": f"{IDEMPOTENCY_HEADER} was already used for a different request"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if record is None or record.status_code is None:
+        return Response({"error": "A request with this Idempotency-Key is already in progress"},
+                        status=status.HTTP_409_CONFLICT)
+    return Response(record.response_body, status=record.status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def idempotent(view_method):
+    """
+    Make a write view method idempotent for requests carrying an Idempotency-Key header.
+
+    The first request with a key reserves it for IDEMPOTENCY_KEY_LEASE, then runs the view and stores its
+    response in the same transaction as the write, so the write and the stored response commit together.
+    Retries with the same key and request get the stored response back without running the write again.
+    A key reused with a different payload or If-Match header is rejected with 422, and a retry arriving while
+    the reservation is held with 409. Server errors roll back the write and release the key, so the client can
+    retry them with the same key. If the process dies before committing, the key is released when its lease ends.
+
+    Args:
+        view_method (function): The view method handling the write.
+
+    Returns:
+        function: The wrapped view method.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        request_hash = _request_hash(request)
+        now = timezone.now()
+        # Free the key if its stored response expired or its reservation outlived the lease.
+        IdempotencyKey.objects.filter(user_id=request.user.id, key=key, expires_at__lte=now).delete()
+
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(key=key, user_id=request.user.id, request_hash=request_hash,
+                                                       expires_at=now + settings.IDEMPOTENCY_KEY_LEASE)
+        except IntegrityError:
+            return _replay(request, key, request_hash)
+
+        stored = False
+        try:
+            with transaction.atomic():
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code >= 500:
+                    # Roll back whatever the failed request wrote, so a retry with the same key is safe.
+                    transaction.set_rollback(True)
+                else:
+                    # Only the holder of the reservation can store a response: if the lease ran out and a retry
+                    # took the key over, this request's write is rolled back.
+                    stored = IdempotencyKey.objects.filter(id=record.id, status_code__isnull=True).update(
+                        status_code=response.status_code, response_body=response.data,
+                        expires_at=timezone.now() + settings.IDEMPOTENCY_KEY_TTL)
+                    if not stored:
+                        transaction.set_rollback(True)
+                        response = Response({"error": "A request with this Idempotency-Key is already in progress"},
+                                            status=status.HTTP_409_CONFLICT)
+        finally:
+            if not stored:
+                # Nothing was committed, release the reservation.
+                IdempotencyKey.objects.filter(id=record.id, status_code__isnull=True).delete()
+        return response
+
+    return wrapper
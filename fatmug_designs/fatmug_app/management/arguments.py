@@ -0,0 +1,67 @@
+import argparse
+
+
+def positive_int(value):
+    """
+    Parse a command line argument as an integer greater than zero.
+
+    Args:
+        value (str): The argument value.
+
+    Returns:
+        int: The parsed value.
+
+    Raises:
+        ArgumentTypeError: If the value is not a positive integer.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not an integer")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"{value!r} must be greater than zero")
+    return number
+
+
+def positive_float(value):
+    """
+    Parse a command line argument as a number greater than zero.
+
+    Args:
+        value (str): The argument value.
+
+    Returns:
+        float: The parsed value.
+
+    Raises:
+        ArgumentTypeError: If the value is not a positive number.
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a number")
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"{value!r} must be greater than zero")
+    return number
+
+
+def non_negative_int(value):
+    """
+    Parse a command line argument as an integer greater than or equal to zero.
+
+    Args:
+        value (str): The argument value.
+
+    Returns:
+        int: The parsed value.
+
+    Raises:
+        ArgumentTypeError: If the value is not a non-negative integer.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not an integer")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value!r} must not be negative")
+    return number
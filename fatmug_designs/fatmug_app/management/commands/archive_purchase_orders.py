@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from fatmug_app.archive import archive_purchase_order_batch
+from fatmug_app.management.arguments import positive_int
+
+
+class Command(BaseCommand):
+    """
+    Move completed purchase orders older than a threshold into the compressed archive table in batches.
+    """
+
+    help = "Archive completed purchase orders placed more than --days days ago."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=positive_int, default=365,
+                            help="Age in days after which orders are archived.")
+        parser.add_argument("--batch-size", type=positive_int, default=1000,
+                            help="Number of orders archived per transaction.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        archived = 0
+        started = time.monotonic()
+
+        while True:
+            count = archive_purchase_order_batch(cutoff, options["batch_size"])
+            if not count:
+                break
+            archived += count
+            self.stdout.write(f"{archived} purchase orders archived")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} purchase orders in {elapsed:.2f}s."))
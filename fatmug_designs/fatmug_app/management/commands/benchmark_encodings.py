@@ -0,0 +1,82 @@
+import gzip
+import time
+from importlib.util import find_spec
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from fatmug_app.benchmarks import create_benchmark_rows
+from fatmug_app.middleware import brotli
+from fatmug_app.models import PurchaseOrder
+from fatmug_app.renderers import FastJSONRenderer, MessagePackRenderer
+from fatmug_app.serializers import (
+    PurchaseOrderSerializer,
+    PurchaseOrderValuesSerializer,
+    NormalizedPurchaseOrderValuesSerializer,
+)
+
+
+class Command(BaseCommand):
+    """
+    Compare payload size and encode time of the purchase order listing encodings.
+
+    The baseline is the original Response(PurchaseOrderSerializer(..., many=True).data) path rendered by
+    JSONRenderer. Every variant is measured uncompressed, gzip-compressed and, when the Brotli package is
+    installed, Brotli-compressed with the settings of CompressionMiddleware. The MessagePack variants are only
+    measured when msgpack is installed. The benchmark rows are created inside a transaction that is rolled
+    back at the end.
+    """
+
+    help = "Benchmark payload size and encode time of purchase order listing encodings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="Number of purchase orders to encode.")
+        parser.add_argument("--vendors", type=int, default=50, help="Number of vendors owning the purchase orders.")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs; the best one is reported.")
+
+    def handle(self, *args, **options):
+        compressors = [("identity", None), ("gzip", lambda content: gzip.compress(content, compresslevel=6))]
+        if brotli is not None:
+            compressors.append(("br", lambda content: brotli.compress(content, quality=5)))
+
+        with transaction.atomic():
+            create_benchmark_rows(options["rows"], options["vendors"])
+            purchase_orders = PurchaseOrder.objects.order_by("id")
+
+            variants = [
+                ("baseline JSON", JSONRenderer(), lambda: PurchaseOrderSerializer(purchase_orders, many=True).data),
+                ("fast JSON", FastJSONRenderer(), lambda: PurchaseOrderValuesSerializer(purchase_orders).data),
+                ("normalized JSON", FastJSONRenderer(),
+                 lambda: NormalizedPurchaseOrderValuesSerializer(purchase_orders).data),
+            ]
+            if find_spec("msgpack"):
+                variants += [
+                    ("MessagePack", MessagePackRenderer(), lambda: PurchaseOrderValuesSerializer(purchase_orders).data),
+                    ("normalized MessagePack", MessagePackRenderer(),
+                     lambda: NormalizedPurchaseOrderValuesSerializer(purchase_orders).data),
+                ]
+
+            baseline = None
+            for name, renderer, serialize in variants:
+                encode_time, content = self._time(options["repeat"], lambda: renderer.render(serialize()))
+                for encoding, compress in compressors:
+                    total_time, size = encode_time, len(content)
+                    if compress is not None:
+                        compress_time, compressed = self._time(options["repeat"], lambda: compress(content))
+                        total_time, size = encode_time + compress_time, len(compressed)
+                    if baseline is None:
+                        baseline = (total_time, size)
+
+                    self.stdout.write(f"{name} ({encoding}): {size:,} bytes ({size / baseline[1]:.1%} of baseline), "
+                                      f"{total_time * 1000:,.1f} ms ({baseline[0] / total_time:.1f}x faster)")
+
+            transaction.set_rollback(True)
+
+    def _time(self, repeat, function):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function()
+            best = min(best, time.perf_counter() - started)
+        return best, result
@@ -0,0 +1,91 @@
+import os
+import random
+import time
+from multiprocessing import Process
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from fatmug_app.benchmarks import create_benchmark_rows
+from fatmug_app.management.arguments import positive_int
+from fatmug_app.metric_workers import get_shard, run_worker
+from fatmug_app.models import Vendor, PurchaseOrder, HistoricalPerformance, PendingMetricUpdate
+from fatmug_app.track_performance import METRIC_FIELDS, create_performance_metrics
+
+
+class Command(BaseCommand):
+    """
+    Measure the throughput of performance metric updates inline and with 1 to N metric worker processes.
+
+    Workers fold the queued updates of a vendor within a batch into one recomputation, while the inline path
+    recomputes on every update, so both the updates drained and the metric recomputations per second are
+    reported. Worker processes only see committed data, so the benchmark vendors and purchase orders are committed
+    and deleted again at the end. Run it against a scratch database: with SQLite, writes from several
+    processes are serialized by the database lock and do not scale.
+    """
+
+    help = "Benchmark metric updates per second inline and with 1 to --max-workers metric workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-workers", type=positive_int, default=os.cpu_count(),
+                            help="Largest number of workers.")
+        parser.add_argument("--updates", type=positive_int, default=5000, help="Number of metric updates per run.")
+        parser.add_argument("--rows", type=positive_int, default=5000, help="Number of benchmark purchase orders.")
+        parser.add_argument("--vendors", type=positive_int, default=200,
+                            help="Number of vendors owning the purchase orders.")
+        parser.add_argument("--batch-size", type=positive_int, default=500,
+                            help="Maximum number of queued updates processed per worker batch.")
+
+    def handle(self, *args, **options):
+        vendors = create_benchmark_rows(options["rows"], options["vendors"])
+        vendor_ids = [vendor.id for vendor in vendors]
+        updates = [random.choice(vendors) for _ in range(options["updates"])]
+        try:
+            self._reset_metrics(vendor_ids)
+            started = time.perf_counter()
+            for vendor in updates:
+                create_performance_metrics(vendor)
+            baseline = len(updates) / (time.perf_counter() - started)
+            # Every inline update is a recomputation.
+            self.stdout.write(f"inline: {baseline:,.0f} updates/s, {baseline:,.0f} recomputations/s")
+
+            for workers in range(1, options["max_workers"] + 1):
+                self._reset_metrics(vendor_ids)
+                PendingMetricUpdate.objects.bulk_create([
+                    PendingMetricUpdate(vendor_id=vendor.id, shard=get_shard(vendor.id, workers)) for vendor in updates
+                ], batch_size=1000)
+
+                elapsed = self._run_workers(workers, options["batch_size"])
+                rate = len(updates) / elapsed
+                recomputations = self._count_recomputations(updates, workers, options["batch_size"])
+                self.stdout.write(f"{workers} worker{'s' if workers > 1 else ''}: {rate:,.0f} updates/s "
+                                  f"({rate / baseline:.1f}x inline), {recomputations / elapsed:,.0f} recomputations/s "
+                                  f"({recomputations:,} for {len(updates):,} updates)")
+        finally:
+            PendingMetricUpdate.objects.filter(vendor_id__in=vendor_ids).delete()
+            HistoricalPerformance.objects.filter(vendor_id__in=vendor_ids).delete()
+            PurchaseOrder.objects.filter(vendor_id__in=vendor_ids).delete()
+            Vendor.all_objects.filter(id__in=vendor_ids).delete()
+
+    def _reset_metrics(self, vendor_ids):
+        Vendor.all_objects.filter(id__in=vendor_ids).update(**dict.fromkeys(METRIC_FIELDS, 0))
+
+    def _count_recomputations(self, updates, workers, batch_size):
+        # Shards claim their updates in queue order, batch_size at a time, recomputing each vendor once per batch.
+        shards = [[] for _ in range(workers)]
+        for vendor in updates:
+            shards[get_shard(vendor.id, workers)].append(vendor.id)
+        return sum(len(set(shard[start:start + batch_size]))
+                   for shard in shards for start in range(0, len(shard), batch_size))
+
+    def _run_workers(self, workers, batch_size):
+        # Worker processes must not share the parent's database connections.
+        connections.close_all()
+        processes = [Process(target=run_worker, args=(shard, workers, batch_size, 0, True))
+                     for shard in range(workers)]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return time.perf_counter() - started
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from fatmug_app.benchmarks import create_benchmark_rows
+from fatmug_app.models import PurchaseOrder
+from fatmug_app.renderers import FastJSONRenderer
+from fatmug_app.serializers import PurchaseOrderSerializer, PurchaseOrderValuesSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compare the throughput of the ModelSerializer listing path with the values_list fast path.
+
+    The benchmark rows are created inside a transaction that is rolled back at the end.
+    """
+
+    help = "Benchmark purchase order listing serialization (rows per second)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="Number of purchase orders to serialize.")
+        parser.add_argument("--vendors", type=int, default=50, help="Number of vendors owning the purchase orders.")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs; the best one is reported.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            create_benchmark_rows(options["rows"], options["vendors"])
+            purchase_orders = PurchaseOrder.objects.order_by("id")
+
+            paths = [
+                ("ModelSerializer + JSONRenderer", JSONRenderer(),
+                 lambda: PurchaseOrderSerializer(purchase_orders, many=True).data),
+                ("ValuesSerializer + FastJSONRenderer", FastJSONRenderer(),
+                 lambda: PurchaseOrderValuesSerializer(purchase_orders).data),
+            ]
+            outputs = []
+            for name, renderer, serialize in paths:
+                serialize_time, render_time = float("inf"), float("inf")
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    data = serialize()
+                    serialized = time.perf_counter()
+                    content = renderer.render(data)
+                    serialize_time = min(serialize_time, serialized - started)
+                    render_time = min(render_time, time.perf_counter() - serialized)
+
+                rows = len(data)
+                outputs.append(data)
+                self.stdout.write(f"{name}: serialize {rows / serialize_time:,.0f} rows/s, "
+                                  f"render {rows / render_time:,.0f} rows/s, "
+                                  f"total {rows / (serialize_time + render_time):,.0f} rows/s, {len(content):,} bytes")
+
+            self.stdout.write(f"Identical output: {'yes' if outputs[0] == outputs[1] else 'no'}")
+            transaction.set_rollback(True)
+
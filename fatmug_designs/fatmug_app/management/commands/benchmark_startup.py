@@ -0,0 +1,93 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from fatmug_app.management.arguments import positive_int
+
+# Runs in a fresh interpreter for each settings profile and prints its measurements as JSON.
+CHILD_SCRIPT = """
+import argparse, json, os, sys, time
+parser = argparse.ArgumentParser()
+parser.add_argument("--requests", type=int, required=True)
+parser.add_argument("--path", required=True)
+options = parser.parse_args()
+
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns
+startup = time.perf_counter() - started
+
+from django.test import Client
+from rest_framework.settings import api_settings
+# Keep the throttles in the measured path, with quotas the benchmark cannot exhaust.
+api_settings.DEFAULT_THROTTLE_RATES = dict.fromkeys(api_settings.DEFAULT_THROTTLE_RATES, "1000000/s")
+client = Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION="Bearer " + os.environ["BENCHMARK_ACCESS_TOKEN"])
+response = client.get(options.path)
+if response.status_code != 200:
+    sys.exit(f"GET {options.path} returned {response.status_code}")
+started = time.perf_counter()
+for _ in range(options.requests):
+    client.get(options.path)
+per_request = (time.perf_counter() - started) / options.requests
+print(json.dumps({"startup": startup, "per_request": per_request, "modules": len(sys.modules)}))
+"""
+
+
+class Command(BaseCommand):
+    """
+    Compare worker startup time and per-request framework overhead of the full and API-only settings.
+
+    Each run starts a fresh interpreter that loads the settings, the WSGI application and the URLconf,
+    then times requests authenticated with a JWT access token of an admin user. The default path, the
+    profile listing, goes through the whole middleware, authentication, permission and throttling stack
+    with a single query loading the user.
+    """
+
+    help = "Benchmark startup and per-request overhead of the full and API-only settings profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Admin user the requests are authenticated as.")
+        parser.add_argument("--path", default="/api/profiles/", help="Path of the timed GET requests.")
+        parser.add_argument("--runs", type=positive_int, default=5, help="Number of fresh processes per profile.")
+        parser.add_argument("--requests", type=positive_int, default=2000,
+                            help="Number of requests timed per process.")
+        parser.add_argument("--profiles", nargs="+",
+                            default=["fatmug_designs.settings", "fatmug_designs.settings_api"],
+                            help="Settings modules to compare.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options["username"], is_staff=True).first()
+        if user is None:
+            raise CommandError(f"No admin user named {options['username']!r}.")
+        # Passed through the environment, so the token does not show up in the process list.
+        token = str(AccessToken.for_user(user))
+
+        for profile in options["profiles"]:
+            env = {**os.environ, "DJANGO_SETTINGS_MODULE": profile, "BENCHMARK_ACCESS_TOKEN": token}
+            command = [sys.executable, "-c", CHILD_SCRIPT, "--requests", str(options["requests"]),
+                       "--path", options["path"]]
+            results = []
+            process_times = []
+            for _ in range(options["runs"]):
+                started = time.perf_counter()
+                output = subprocess.run(command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+                if output.returncode:
+                    raise CommandError(f"{profile}: {output.stderr.strip().splitlines()[-1]}")
+                process_times.append(time.perf_counter() - started)
+                results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+            startup = statistics.median(result["startup"] for result in results)
+            per_request = statistics.median(result["per_request"] for result in results)
+            self.stdout.write(f"{profile}: startup {startup * 1000:.1f} ms "
+                              f"(process {statistics.median(process_times) * 1000:.1f} ms), "
+                              f"{per_request * 1e6:.1f} us/request, {results[0]['modules']} modules loaded")
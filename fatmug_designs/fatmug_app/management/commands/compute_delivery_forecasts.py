@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from fatmug_app.forecasting import forecast_vendor_range
+from fatmug_app.management.arguments import positive_float, positive_int
+from fatmug_app.models import Vendor, VendorForecast
+
+FORECAST_FIELDS = ("on_time_probability", "expected_lead_time", "rolling_on_time_rate", "rolling_lead_time",
+                   "sample_size", "computed_at")
+
+
+class Command(BaseCommand):
+    """
+    Compute the delivery forecasts of all vendors in vectorized batches.
+
+    The purchase order history of each chunk of vendors is loaded column-wise into NumPy arrays and the
+    statistics of every vendor in the chunk are computed in a single pass.
+    """
+
+    help = "Compute expected on-time probability and lead time of every vendor."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=positive_int, default=500, help="Number of vendors loaded per batch.")
+        parser.add_argument("--window", type=positive_int, default=20,
+                            help="Number of most recent deliveries in the rolling statistics.")
+        parser.add_argument("--halflife", type=positive_float, default=10,
+                            help="Number of deliveries after which the weight of a delivery halves.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        vendor_ids = list(Vendor.objects.order_by("id").values_list("id", flat=True))
+        started = time.monotonic()
+        forecasted = 0
+
+        for i in range(0, len(vendor_ids), chunk_size):
+            chunk = vendor_ids[i:i + chunk_size]
+            forecasts = forecast_vendor_range(chunk[0], chunk[-1], options["window"], options["halflife"])
+            VendorForecast.objects.bulk_create(
+                [VendorForecast(vendor_id=vendor_id, **fields) for vendor_id, fields in forecasts.items()],
+                update_conflicts=True, unique_fields=["vendor"], update_fields=FORECAST_FIELDS,
+            )
+            forecasted += len(forecasts)
+            self.stdout.write(f"{i + len(chunk)}/{len(vendor_ids)} vendors processed")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Computed {forecasted} vendor forecasts in {elapsed:.2f}s."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from fatmug_app.archive import purge_vendor
+from fatmug_app.management.arguments import positive_int
+from fatmug_app.models import Vendor
+
+
+class Command(BaseCommand):
+    """
+    Permanently delete soft-deleted vendors together with their purchase orders and history, in batches.
+    """
+
+    help = "Purge vendors deleted through the API, removing their dependent rows in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=positive_int, default=1000,
+                            help="Number of rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        vendors = Vendor.all_objects.filter(deleted_at__isnull=False).order_by("deleted_at")
+        for vendor in vendors:
+            deleted = purge_vendor(vendor, options["batch_size"])
+            self.stdout.write(f"Purged vendor {vendor.name} and {deleted} related records")
+
+        self.stdout.write(self.style.SUCCESS("Purge complete."))
@@ -0,0 +1,100 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from fatmug_app.management.arguments import non_negative_int, positive_int
+from fatmug_app.models import Vendor, PurchaseOrder, VendorArchiveAggregate
+from fatmug_app.track_performance import add_archived_counters, aggregate_purchase_orders, apply_performance_counters
+
+
+def _init_worker():
+    """
+    Prepare a pool worker process for database access.
+    """
+    django.setup()
+
+
+def _aggregate_chunk(vendor_ids):
+    """
+    Aggregate the purchase orders of a sorted chunk of vendor IDs.
+
+    Args:
+        vendor_ids (list): Sorted vendor IDs of the chunk.
+
+    Returns:
+        tuple: The chunk's vendor IDs and their aggregated counters.
+    """
+    vendor_range = {"vendor_id__gte": vendor_ids[0], "vendor_id__lte": vendor_ids[-1]}
+    counters = aggregate_purchase_orders(PurchaseOrder.objects.filter(**vendor_range))
+    return vendor_ids, add_archived_counters(counters, VendorArchiveAggregate.objects.filter(**vendor_range))
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the performance metrics of every vendor from grouped aggregate queries.
+
+    Vendors are processed in ascending ID chunks; the last completed chunk is written to a checkpoint
+    file so an interrupted run can be resumed with --resume.
+    """
+
+    help = "Rebuild the performance metrics of all vendors from their purchase orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=positive_int, default=1000,
+                            help="Number of vendors per aggregate query.")
+        parser.add_argument("--workers", type=non_negative_int, default=0,
+                            help="Number of worker processes running the aggregate queries (0 runs in-process).")
+        parser.add_argument("--history", action=argparse.BooleanOptionalAction,
+                            default=settings.PERFORMANCE_SNAPSHOTS_ON_WRITE,
+                            help="Create HistoricalPerformance snapshots for the rebuilt vendors "
+                                 "(default PERFORMANCE_SNAPSHOTS_ON_WRITE; the snapshot_performance scheduler "
+                                 "records changed metrics otherwise).")
+        parser.add_argument("--resume", action="store_true", help="Resume after the last checkpointed vendor.")
+        parser.add_argument("--checkpoint", default=str(Path(settings.BASE_DIR) / ".rebuild_metrics.checkpoint"),
+                            help="Path of the checkpoint file.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        checkpoint = Path(options["checkpoint"])
+
+        last_vendor_id = 0
+        if options["resume"] and checkpoint.exists():
+            last_vendor_id = int(checkpoint.read_text().strip() or 0)
+            self.stdout.write(f"Resuming after vendor {last_vendor_id}.")
+
+        vendor_ids = list(Vendor.objects.filter(id__gt=last_vendor_id).order_by("id").values_list("id", flat=True))
+        chunks = [vendor_ids[i:i + chunk_size] for i in range(0, len(vendor_ids), chunk_size)]
+        total = len(vendor_ids)
+
+        if options["workers"] > 0:
+            # Forked workers must not share the parent's database connections.
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker)
+            results = executor.map(_aggregate_chunk, chunks)
+        else:
+            executor = None
+            results = map(_aggregate_chunk, chunks)
+
+        processed = 0
+        started = time.monotonic()
+        try:
+            for chunk, counters in results:
+                apply_performance_counters(chunk, counters, history=options["history"])
+                checkpoint.write_text(str(chunk[-1]))
+
+                processed += len(chunk)
+                elapsed = max(time.monotonic() - started, 1e-9)
+                self.stdout.write(f"{processed}/{total} vendors rebuilt ({processed / elapsed:.0f} vendors/s)")
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        checkpoint.unlink(missing_ok=True)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt metrics for {processed} vendors in {elapsed:.2f}s."))
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from fatmug_app.concurrency import next_version
+from fatmug_app.management.arguments import positive_int
+from fatmug_app.models import Vendor, PurchaseOrder, VendorArchiveAggregate
+from fatmug_app.po_counters import PO_COUNTER_FIELDS, STATUS_COUNTER_FIELDS
+
+
+def count_purchase_orders(vendor_filter):
+    """
+    Recount the purchase order counters of vendors from the purchase order and archive tables.
+
+    Args:
+        vendor_filter (dict): Lookup selecting the vendors by their ID, e.g. {"vendor_id__in": [...]}.
+
+    Returns:
+        dict: The expected counter values keyed by vendor ID.
+    """
+    annotations = {field: Count("id", filter=Q(status=status)) for status, field in STATUS_COUNTER_FIELDS.items()}
+    rows = (PurchaseOrder.objects.filter(**vendor_filter).order_by().values("vendor_id")
+            .annotate(**annotations, total_quantity=Sum("quantity")))
+
+    expected = {}
+    for row in rows:
+        vendor_id = row.pop("vendor_id")
+        row["total_quantity"] = row["total_quantity"] or 0
+        expected[vendor_id] = row
+
+    # Archived orders are all completed and still count towards their vendor.
+    for archived in VendorArchiveAggregate.objects.filter(**vendor_filter):
+        vendor_expected = expected.setdefault(archived.vendor_id, dict.fromkeys(PO_COUNTER_FIELDS, 0))
+        vendor_expected["completed_po_count"] += archived.completed_orders
+        vendor_expected["total_quantity"] += archived.total_quantity
+    return expected
+
+
+class Command(BaseCommand):
+    """
+    Detect and repair drift between the denormalized purchase order counters of vendors and the actual orders.
+    """
+
+    help = "Reconcile the purchase order counters stored on vendors."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=positive_int, default=1000,
+                            help="Number of vendors checked per query.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report drift, do not repair it.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        vendor_ids = list(Vendor.all_objects.order_by("id").values_list("id", flat=True))
+        drifted = 0
+
+        for i in range(0, len(vendor_ids), chunk_size):
+            chunk = vendor_ids[i:i + chunk_size]
+            expected = count_purchase_orders({"vendor_id__in": chunk})
+            vendors = Vendor.all_objects.filter(id__in=chunk).only("id", "name", *PO_COUNTER_FIELDS)
+            for vendor in vendors:
+                vendor_expected = expected.get(vendor.id, dict.fromkeys(PO_COUNTER_FIELDS, 0))
+                stored = {field: getattr(vendor, field) for field in PO_COUNTER_FIELDS}
+                if stored == vendor_expected:
+                    continue
+
+                drifted += 1
+                self.stdout.write(f"Vendor {vendor.id} ({vendor.name}): stored {stored}, expected {vendor_expected}")
+                if not options["dry_run"]:
+                    self._repair(vendor.id)
+
+        action = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{action} {drifted} vendors with drifted counters."))
+
+    def _repair(self, vendor_id):
+        """
+        Recount and store the counters of a vendor while holding a lock on its row.
+        """
+        with transaction.atomic():
+            Vendor.all_objects.select_for_update().get(id=vendor_id)
+            expected = count_purchase_orders({"vendor_id": vendor_id}).get(
+                vendor_id, dict.fromkeys(PO_COUNTER_FIELDS, 0))
+            Vendor.all_objects.filter(id=vendor_id).update(**expected, version=next_version())
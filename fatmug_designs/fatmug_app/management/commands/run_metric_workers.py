@@ -0,0 +1,53 @@
+from multiprocessing import Process
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from fatmug_app.management.arguments import positive_float, positive_int
+from fatmug_app.metric_workers import run_worker
+
+
+class Command(BaseCommand):
+    """
+    Run the metric worker processes recomputing vendor performance metrics queued by purchase order writes.
+
+    One process is started per shard in METRIC_WORKERS, or a single shard runs in this process with --shard.
+    """
+
+    help = "Run the METRIC_WORKERS metric worker processes, one per vendor shard."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shard", type=int, help="Run only this shard, in the current process.")
+        parser.add_argument("--batch-size", type=positive_int, default=settings.METRIC_WORKER_BATCH_SIZE,
+                            help="Maximum number of queued updates processed per batch.")
+        parser.add_argument("--poll-interval", type=positive_float, default=settings.METRIC_WORKER_POLL_INTERVAL,
+                            help="Seconds to wait before polling an empty queue again.")
+
+    def handle(self, *args, **options):
+        workers = settings.METRIC_WORKERS
+        if not workers:
+            raise CommandError("METRIC_WORKERS is 0: performance metrics are updated in the request threads.")
+
+        worker_options = (workers, options["batch_size"], options["poll_interval"])
+        if options["shard"] is not None:
+            if not 0 <= options["shard"] < workers:
+                raise CommandError(f"--shard must be between 0 and {workers - 1}.")
+            self.stdout.write(f"Running metric worker {options['shard']} of {workers}.")
+            run_worker(options["shard"], *worker_options)
+            return
+
+        # Worker processes must not share the parent's database connections.
+        connections.close_all()
+        processes = [Process(target=run_worker, args=(shard, *worker_options), daemon=True)
+                     for shard in range(workers)]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {workers} metric workers.")
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
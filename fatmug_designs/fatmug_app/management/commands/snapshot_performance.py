@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from fatmug_app.management.arguments import positive_float
+from fatmug_app.track_performance import take_performance_snapshots
+
+
+class Command(BaseCommand):
+    """
+    Take performance metric snapshots of all vendors on a fixed schedule, without an external scheduler or broker.
+
+    Runs are aligned to multiples of the interval, so restarting the command does not shift the schedule
+    and a run that takes long does not delay the following ones. A failed run is reported and retried at
+    the next interval.
+    """
+
+    help = "Snapshot the performance metrics of vendors whose metrics changed, every --interval seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=positive_float,
+                            default=settings.PERFORMANCE_SNAPSHOT_INTERVAL.total_seconds(),
+                            help="Seconds between two snapshot runs (default PERFORMANCE_SNAPSHOT_INTERVAL).")
+        parser.add_argument("--once", action="store_true", help="Take a single snapshot run and exit.")
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            self._run()
+            if options["once"]:
+                break
+
+            # Sleep until the next multiple of the interval.
+            time.sleep(interval - time.time() % interval)
+
+    def _run(self):
+        # Long-running loop: drop connections that timed out or were broken since the last run.
+        close_old_connections()
+        started = time.monotonic()
+        try:
+            created, skipped = take_performance_snapshots()
+        except Exception as e:
+            self.stderr.write(f"Snapshot run failed: {e}")
+            return
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"Took {created} snapshots, skipped {skipped} unchanged vendors in {elapsed:.2f}s.")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from fatmug_app.management.arguments import positive_int
+from fatmug_app.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """
+    Delete expired idempotency keys in batches, using the index on their expiry date.
+    """
+
+    help = "Delete expired idempotency keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=positive_int, default=1000,
+                            help="Number of keys deleted per statement.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            batch_ids = list(IdempotencyKey.objects.filter(expires_at__lte=now)
+                             .values_list("id", flat=True)[:options["batch_size"]])
+            if not batch_ids:
+                break
+            IdempotencyKey.objects.filter(id__in=batch_ids).delete()
+            deleted += len(batch_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys."))
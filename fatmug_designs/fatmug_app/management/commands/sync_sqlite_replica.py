@@ -0,0 +1,35 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    """
+    Copy the default SQLite database onto the replica SQLite file for local testing of replica routing.
+    """
+
+    help = "Refresh the SQLite read replica from the default database, once or every --interval seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="replica", help="Alias of the replica database.")
+        parser.add_argument("--interval", type=float, default=0,
+                            help="Keep syncing every this many seconds (0 syncs once).")
+
+    def handle(self, *args, **options):
+        source = connections["default"].settings_dict
+        target = connections[options["database"]].settings_dict
+        if "sqlite3" not in source["ENGINE"] or "sqlite3" not in target["ENGINE"]:
+            raise CommandError("sync_sqlite_replica only supports SQLite databases.")
+
+        while True:
+            started = time.monotonic()
+            # The backup API copies a consistent snapshot even while the source is being written.
+            with sqlite3.connect(source["NAME"]) as source_db, sqlite3.connect(target["NAME"]) as target_db:
+                source_db.backup(target_db)
+            self.stdout.write(f"Replica synced in {(time.monotonic() - started) * 1000:.1f} ms")
+
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,156 @@
+import logging
+import time
+
+import django
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+
+from .models import PendingMetricUpdate
+from .track_performance import create_performance_metrics, refresh_performance_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def get_shard(vendor_id, workers):
+    """
+    Map a vendor onto the metric worker that owns it.
+
+    Args:
+        vendor_id (int): The ID of the vendor.
+        workers (int): The number of metric workers.
+
+    Returns:
+        int: The shard of the vendor, between 0 and workers - 1.
+    """
+    return vendor_id % workers
+
+
+def reshard_pending_updates(workers):
+    """
+    Move the queued updates sharded for another number of workers to the shard owning their vendor now.
+
+    Updates queued before METRIC_WORKERS changed, or by processes still running with the old value, would
+    otherwise wait in shards no worker polls, or be processed by a worker not owning their vendor.
+
+    Args:
+        workers (int): The current number of metric workers.
+
+    Returns:
+        int: The number of queued updates moved.
+    """
+    owner = F("vendor_id") % workers
+    return PendingMetricUpdate.objects.exclude(shard=owner).update(shard=owner)
+
+
+def update_performance_metrics(vendor):
+    """
+    Update the performance metrics of a vendor after one of its purchase orders was written.
+
+    With METRIC_WORKERS set, the update is queued for the metric worker owning the vendor instead of being
+    computed in the request thread.
+
+    Args:
+        vendor (Vendor): The vendor whose purchase orders changed.
+    """
+    if not settings.METRIC_WORKERS:
+        create_performance_metrics(vendor)
+        return
+
+    PendingMetricUpdate.objects.create(vendor_id=vendor.id, shard=get_shard(vendor.id, settings.METRIC_WORKERS))
+
+
+class MetricWorker:
+    """
+    MetricWorker recomputes the performance metrics of the vendors of one shard from the pending update queue.
+
+    Every vendor belongs to exactly one shard, so workers never write the same Vendor rows and need no locking
+    between each other. A worker folds the queued updates of a batch into one recomputation per vendor, starting
+    from the metrics stored when the batch is claimed, and writes the changed vendors with a single bulk update.
+    When its queue is empty, it moves the updates sharded for another number of workers to their current shard.
+
+    Attributes:
+        shard (int): The shard owned by the worker.
+        workers (int): The number of metric workers.
+        batch_size (int): The maximum number of queued updates processed per batch.
+        poll_interval (float): Seconds to wait before polling an empty queue again.
+    """
+
+    def __init__(self, shard, workers, batch_size, poll_interval):
+        self.shard = shard
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def claim_batch(self):
+        """
+        Read the oldest queued updates of the shard.
+
+        Returns:
+            list: The (ID, vendor ID) of at most batch_size queued updates.
+        """
+        return list(PendingMetricUpdate.objects.filter(shard=self.shard).order_by("id")
+                    .values_list("id", "vendor_id")[:self.batch_size])
+
+    def process_batch(self):
+        """
+        Apply one batch of queued updates of the shard.
+
+        Returns:
+            int: The number of queued updates processed.
+        """
+        batch = self.claim_batch()
+        if not batch and reshard_pending_updates(self.workers):
+            # Some of the moved updates may belong to this shard.
+            batch = self.claim_batch()
+        if not batch:
+            return 0
+
+        vendor_ids = sorted({vendor_id for _, vendor_id in batch})
+        refresh_performance_metrics(vendor_ids)
+        PendingMetricUpdate.objects.filter(id__in=[update_id for update_id, _ in batch]).delete()
+        return len(batch)
+
+    def run(self, drain=False):
+        """
+        Process the queue of the shard until stopped.
+
+        Args:
+            drain (bool): Return once the queue of the shard is empty instead of polling for more updates.
+
+        Returns:
+            int: The number of queued updates processed.
+        """
+        processed = 0
+        while True:
+            close_old_connections()
+            try:
+                count = self.process_batch()
+            except Exception:
+                logger.exception("Metric worker %d failed to process a batch", self.shard)
+                count = 0
+
+            processed += count
+            if count:
+                continue
+            if drain:
+                return processed
+            time.sleep(self.poll_interval)
+
+
+def run_worker(shard, workers, batch_size, poll_interval, drain=False):
+    """
+    Run the metric worker of a shard as the target of a worker process.
+
+    Args:
+        shard (int): The shard owned by the worker.
+        workers (int): The number of metric workers.
+        batch_size (int): The maximum number of queued updates processed per batch.
+        poll_interval (float): Seconds to wait before polling an empty queue again.
+        drain (bool): Exit once the queue of the shard is empty.
+
+    Returns:
+        int: The number of queued updates processed.
+    """
+    django.setup()
+    return MetricWorker(shard, workers, batch_size, poll_interval).run(drain=drain)
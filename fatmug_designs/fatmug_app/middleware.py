@@ -0,0 +1,117 @@
+import random
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - Brotli is optional, gzip is used without it.
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+UNSAFE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+class ReadPrimaryAfterWriteMiddleware:
+    """
+    Set a short-lived sticky-primary cookie on responses to successful writes.
+
+    While the cookie is present, views reading from the replica use the primary database instead, so the
+    client reads its own writes even if the replica lags behind.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method in UNSAFE_METHODS and response.status_code < 400:
+            response.set_cookie(settings.READ_PRIMARY_COOKIE, "1", max_age=settings.READ_PRIMARY_SECONDS,
+                                httponly=True, samesite="Lax")
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses with Brotli when the client accepts it, and with gzip otherwise.
+
+    Brotli has no equivalent of the random-length gzip header with which Django mitigates the BREACH attack, so
+    the responses of views returning credentials (views with returns_credentials set) and streaming responses
+    are left to GZipMiddleware. Without the Brotli package installed this behaves exactly like GZipMiddleware.
+    """
+
+    brotli_quality = 5
+
+    def process_response(self, request, response):
+        if (brotli is None or not re_accepts_brotli.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+                or response.has_header("Content-Encoding") or response.streaming
+                or self._returns_credentials(response)):
+            return super().process_response(request, response)
+
+        # It's not worth attempting to compress really short responses.
+        if len(response.content) < 200:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed_content = brotli.compress(response.content, quality=self.brotli_quality)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
+
+    def _returns_credentials(self, response):
+        # DRF responses reference the view that rendered them.
+        view = getattr(response, "renderer_context", {}).get("view")
+        return getattr(view, "returns_credentials", False)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests from admin users sending "X-Profile: 1", and a sampled fraction of all requests.
+
+    The API authenticates in the views, so a request sending the header is first authenticated here with the
+    API's authentication classes, and nothing is profiled unless it carries valid credentials of an admin user.
+    Profiles hold the sampled call stacks and the SQL breakdown of the request. They are kept in a ring buffer of
+    PROFILING_BUFFER_SIZE entries per process, and the ID of the profile is returned in the X-Profile-Id response
+    header. PROFILING_SAMPLE_RATE sets the fraction of requests profiled without the header (0 disables sampling).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.PROFILING_SAMPLE_RATE
+        requested = not sampled and request.headers.get("X-Profile") == "1" and self._is_admin(request)
+        if not (requested or sampled):
+            return self.get_response(request)
+
+        # Imported on the first profiled request, so workers that never profile do not load it.
+        from .profiling import RequestProfiler, store_profile
+
+        with RequestProfiler(settings.PROFILING_INTERVAL) as profiler:
+            response = self.get_response(request)
+        response.headers["X-Profile-Id"] = str(store_profile(request, response, profiler))
+        return response
+
+    def _is_admin(self, request):
+        # The authentication classes only read the credentials from the headers, so they accept the HttpRequest.
+        from rest_framework.exceptions import APIException
+        from rest_framework.settings import api_settings
+
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                user_auth = authentication_class().authenticate(request)
+            except APIException:
+                return False
+            if user_auth is not None:
+                return bool(user_auth[0].is_staff)
+        return False
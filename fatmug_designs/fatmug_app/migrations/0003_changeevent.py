@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:02
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fatmug_app', '0002_alter_purchaseorder_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(help_text='Model name of the changed object.', max_length=30)),
+                ('object_id', models.BigIntegerField(help_text='Primary key of the changed object.')),
+                ('action', models.CharField(choices=[('created', 'created'), ('updated', 'updated'), ('deleted', 'deleted')], help_text='Kind of change applied to the object.', max_length=10)),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Field values of the object after the change.')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the change was recorded.')),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fatmug_app', '0003_changeevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPurchaseOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('po_id', models.BigIntegerField(help_text='ID of the archived purchase order.', unique=True)),
+                ('vendor_id', models.BigIntegerField(db_index=True, help_text='ID of the vendor of the archived purchase order.')),
+                ('order_date', models.DateTimeField(help_text='Date when the order was placed.')),
+                ('data', models.BinaryField(help_text='zlib-compressed JSON of the purchase order fields.')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the purchase order was archived.')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VendorArchiveAggregate',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='fatmug_app.vendor')),
+                ('total_orders', models.IntegerField(default=0, help_text='Number of archived purchase orders.')),
+                ('completed_orders', models.IntegerField(default=0, help_text='Number of archived completed purchase orders.')),
+                ('on_time_orders', models.IntegerField(default=0, help_text='Number of archived purchase orders delivered on time.')),
+                ('quality_rating_sum', models.FloatField(default=0, help_text='Sum of the quality ratings of archived orders.')),
+                ('quality_rating_count', models.IntegerField(default=0, help_text='Number of archived orders with a quality rating.')),
+                ('response_time_sum', models.FloatField(default=0, help_text='Sum of the response times of archived orders (seconds).')),
+                ('response_time_count', models.IntegerField(default=0, help_text='Number of archived acknowledged orders.')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Timestamp when the vendor was deleted, pending purge.', null=True),
+        ),
+    ]
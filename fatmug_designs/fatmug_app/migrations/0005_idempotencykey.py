@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fatmug_app', '0004_vendor_soft_delete_and_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Idempotency-Key header sent by the client.', max_length=255)),
+                ('user_id', models.BigIntegerField(help_text='ID of the user who sent the request.')),
+                ('request_hash', models.CharField(help_text='SHA-256 of the request method, path and payload.', max_length=64)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, help_text='Status code of the stored response, empty while in progress.', null=True)),
+                ('response_body', models.JSONField(blank=True, help_text='Body of the stored response.', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the key was first used.')),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='Timestamp after which the key can be swept.')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user_id', 'key'), name='unique_idempotency_key_per_user'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fatmug_app', '0005_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorForecast',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='fatmug_app.vendor')),
+                ('on_time_probability', models.FloatField(help_text='Exponentially weighted probability of an on-time delivery.')),
+                ('expected_lead_time', models.FloatField(help_text='Exponentially weighted lead time from order to delivery (days).')),
+                ('rolling_on_time_rate', models.FloatField(help_text='On-time rate over the most recent deliveries.')),
+                ('rolling_lead_time', models.FloatField(help_text='Average lead time over the most recent deliveries (days).')),
+                ('sample_size', models.IntegerField(help_text='Number of delivered purchase orders the forecast is based on.')),
+                ('computed_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the forecast was computed.')),
+            ],
+        ),
+    ]
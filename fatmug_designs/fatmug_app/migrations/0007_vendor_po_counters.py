@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fatmug_app', '0006_vendorforecast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='canceled_po_count',
+            field=models.IntegerField(default=0, help_text='Number of canceled purchase orders.'),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='completed_po_count',
+            field=models.IntegerField(default=0, help_text='Number of completed purchase orders.'),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='open_po_count',
+            field=models.IntegerField(default=0, help_text='Number of pending purchase orders.'),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='total_quantity',
+            field=models.BigIntegerField(default=0, help_text='Total quantity of items ordered from the vendor.'),
+        ),
+        migrations.AddField(
+            model_name='vendorarchiveaggregate',
+            name='total_quantity',
+            field=models.BigIntegerField(default=0, help_text='Total quantity of items in archived orders.'),
+        ),
+    ]
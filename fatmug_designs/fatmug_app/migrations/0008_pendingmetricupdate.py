@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fatmug_app', '0007_vendor_po_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingMetricUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vendor_id', models.BigIntegerField(help_text='ID of the vendor whose performance metrics must be recomputed.')),
+                ('shard', models.PositiveSmallIntegerField(help_text='Metric worker owning the vendor (vendor ID modulo workers).')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the update was requested.')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['shard', 'id'], name='pending_metric_update_shard')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fatmug_app', '0008_pendingmetricupdate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaseorder',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Incremented on every update of the PO.'),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Incremented on every update of the vendor details.'),
+        ),
+    ]
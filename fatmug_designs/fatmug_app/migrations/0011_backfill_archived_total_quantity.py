@@ -0,0 +1,33 @@
+import json
+import zlib
+
+from django.db import migrations
+
+
+def backfill_archived_total_quantity(apps, schema_editor):
+    """
+    Recount VendorArchiveAggregate.total_quantity from the archived purchase orders.
+
+    The column was added by 0007 with a default of 0, so orders archived before it did not count. The
+    recount covers every archived order, and is therefore also correct for orders archived since then.
+    """
+    ArchivedPurchaseOrder = apps.get_model("fatmug_app", "ArchivedPurchaseOrder")
+    VendorArchiveAggregate = apps.get_model("fatmug_app", "VendorArchiveAggregate")
+
+    totals = {}
+    for vendor_id, data in ArchivedPurchaseOrder.objects.values_list("vendor_id", "data").iterator(chunk_size=2000):
+        totals[vendor_id] = totals.get(vendor_id, 0) + json.loads(zlib.decompress(data))["quantity"]
+
+    for vendor_id, total_quantity in totals.items():
+        VendorArchiveAggregate.objects.filter(vendor_id=vendor_id).update(total_quantity=total_quantity)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fatmug_app', '0010_historicalperformance_vendor_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_archived_total_quantity, migrations.RunPython.noop),
+    ]
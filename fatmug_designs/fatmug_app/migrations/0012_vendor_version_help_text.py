@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fatmug_app', '0011_backfill_archived_total_quantity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vendor',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Incremented on every update of the vendor.'),
+        ),
+    ]
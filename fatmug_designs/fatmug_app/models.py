@@ -1,8 +1,18 @@
 # models.py
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
+class ActiveVendorManager(models.Manager):
+    """
+    Manager returning only the vendors that have not been soft-deleted.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Vendor(models.Model):
     name = models.CharField(max_length=200)
     contact_details = models.TextField(help_text="Contact information of the vendor.")
@@ -13,6 +23,16 @@ class Vendor(models.Model):
     average_response_time = models.FloatField(help_text="Average time taken to acknowledge purchase orders (days).",
                                               default=0)
     fulfillment_rate = models.FloatField(help_text="Percentage of purchase orders fulfilled successfully.", default=0)
+    open_po_count = models.IntegerField(default=0, help_text="Number of pending purchase orders.")
+    completed_po_count = models.IntegerField(default=0, help_text="Number of completed purchase orders.")
+    canceled_po_count = models.IntegerField(default=0, help_text="Number of canceled purchase orders.")
+    total_quantity = models.BigIntegerField(default=0, help_text="Total quantity of items ordered from the vendor.")
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True,
+                                      help_text="Timestamp when the vendor was deleted, pending purge.")
+    version = models.PositiveIntegerField(default=1, help_text="Incremented on every update of the vendor.")
+
+    objects = ActiveVendorManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.name
@@ -36,11 +56,18 @@ class PurchaseOrder(models.Model):
     issue_date = models.DateTimeField(auto_now_add=True, help_text="Timestamp when the PO was issued to the vendor.")
     acknowledgment_date = models.DateTimeField(null=True, blank=True,
                                                help_text="Timestamp when the vendor acknowledged the PO.")
+    version = models.PositiveIntegerField(default=1, help_text="Incremented on every update of the PO.")
 
     def save(self, *args, **kwargs):
-        self.quantity = sum(item["quantity"] for item in self.items)
+        self.update_quantity()
         super().save(*args, **kwargs)
 
+    def update_quantity(self):
+        """
+        Set the total quantity of the PO from its items.
+        """
+        self.quantity = sum(item["quantity"] for item in self.items)
+
     def __str__(self):
         return f"{self.vendor.name} -> {self.po_number}"
 
@@ -54,5 +81,100 @@ class HistoricalPerformance(models.Model):
                                               default=0)
     fulfillment_rate = models.FloatField(help_text="Historical record of the fulfilment rate.", default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["vendor", "date"], name="historical_vendor_date"),
+        ]
+
     def __str__(self):
         return f"{self.vendor.name} -> {self.date}"
+
+
+class ArchivedPurchaseOrder(models.Model):
+    po_id = models.BigIntegerField(unique=True, help_text="ID of the archived purchase order.")
+    vendor_id = models.BigIntegerField(db_index=True, help_text="ID of the vendor of the archived purchase order.")
+    order_date = models.DateTimeField(help_text="Date when the order was placed.")
+    data = models.BinaryField(help_text="zlib-compressed JSON of the purchase order fields.")
+    archived_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp when the purchase order was archived.")
+
+    def __str__(self):
+        return f"{self.vendor_id} -> {self.po_id}"
+
+
+class VendorArchiveAggregate(models.Model):
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True)
+    total_orders = models.IntegerField(default=0, help_text="Number of archived purchase orders.")
+    completed_orders = models.IntegerField(default=0, help_text="Number of archived completed purchase orders.")
+    on_time_orders = models.IntegerField(default=0, help_text="Number of archived purchase orders delivered on time.")
+    quality_rating_sum = models.FloatField(default=0, help_text="Sum of the quality ratings of archived orders.")
+    quality_rating_count = models.IntegerField(default=0, help_text="Number of archived orders with a quality rating.")
+    response_time_sum = models.FloatField(default=0, help_text="Sum of the response times of archived orders (seconds).")
+    response_time_count = models.IntegerField(default=0, help_text="Number of archived acknowledged orders.")
+    total_quantity = models.BigIntegerField(default=0, help_text="Total quantity of items in archived orders.")
+
+    def __str__(self):
+        return f"{self.vendor.name} -> {self.total_orders} archived"
+
+
+class VendorForecast(models.Model):
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True)
+    on_time_probability = models.FloatField(help_text="Exponentially weighted probability of an on-time delivery.")
+    expected_lead_time = models.FloatField(help_text="Exponentially weighted lead time from order to delivery (days).")
+    rolling_on_time_rate = models.FloatField(help_text="On-time rate over the most recent deliveries.")
+    rolling_lead_time = models.FloatField(help_text="Average lead time over the most recent deliveries (days).")
+    sample_size = models.IntegerField(help_text="Number of delivered purchase orders the forecast is based on.")
+    computed_at = models.DateTimeField(auto_now=True, help_text="Timestamp when the forecast was computed.")
+
+    def __str__(self):
+        return f"{self.vendor.name} -> {self.on_time_probability:.2f}"
+
+
+class ChangeEvent(models.Model):
+    ACTION_CHOICES = [
+        ('created', 'created'),
+        ('updated', 'updated'),
+        ('deleted', 'deleted'),
+    ]
+
+    entity = models.CharField(max_length=30, help_text="Model name of the changed object.")
+    object_id = models.BigIntegerField(help_text="Primary key of the changed object.")
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, help_text="Kind of change applied to the object.")
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder,
+                               help_text="Field values of the object after the change.")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp when the change was recorded.")
+
+    def __str__(self):
+        return f"{self.id}: {self.entity} {self.object_id} {self.action}"
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255, help_text="Idempotency-Key header sent by the client.")
+    user_id = models.BigIntegerField(help_text="ID of the user who sent the request.")
+    request_hash = models.CharField(max_length=64, help_text="SHA-256 of the request method, path and payload.")
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True,
+                                                   help_text="Status code of the stored response, empty while in progress.")
+    response_body = models.JSONField(null=True, blank=True, help_text="Body of the stored response.")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp when the key was first used.")
+    expires_at = models.DateTimeField(db_index=True, help_text="Timestamp after which the key can be swept.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user_id", "key"], name="unique_idempotency_key_per_user"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.key}"
+
+
+class PendingMetricUpdate(models.Model):
+    vendor_id = models.BigIntegerField(help_text="ID of the vendor whose performance metrics must be recomputed.")
+    shard = models.PositiveSmallIntegerField(help_text="Metric worker owning the vendor (vendor ID modulo workers).")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Timestamp when the update was requested.")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["shard", "id"], name="pending_metric_update_shard"),
+        ]
+
+    def __str__(self):
+        return f"{self.shard} -> {self.vendor_id}"
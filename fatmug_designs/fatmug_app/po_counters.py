@@ -0,0 +1,73 @@
+from django.db.models import F
+
+from .concurrency import next_version
+from .models import Vendor, PurchaseOrder
+
+# Vendor counter field incremented for each purchase order status.
+STATUS_COUNTER_FIELDS = {
+    "pending": "open_po_count",
+    "complete": "completed_po_count",
+    "canceled": "canceled_po_count",
+}
+
+PO_COUNTER_FIELDS = (*STATUS_COUNTER_FIELDS.values(), "total_quantity")
+
+
+def counter_state(purchase_order):
+    """
+    Capture the fields of a purchase order that the vendor counters depend on.
+
+    Args:
+        purchase_order (PurchaseOrder): The purchase order.
+
+    Returns:
+        tuple: The vendor ID, status and quantity of the purchase order.
+    """
+    return purchase_order.vendor_id, purchase_order.status, purchase_order.quantity
+
+
+def locked_counter_state(purchase_order):
+    """
+    Read the stored counter_state of a purchase order and lock its row until the end of the transaction.
+
+    The state of the instance may be stale or already modified by the request, while the counter deltas must
+    start from the stored row. Call it in the transaction writing the purchase order.
+
+    Args:
+        purchase_order (PurchaseOrder): The purchase order.
+
+    Returns:
+        tuple: The vendor ID, status and quantity of the stored purchase order.
+
+    Raises:
+        PurchaseOrder.DoesNotExist: If the purchase order was deleted.
+    """
+    return PurchaseOrder.objects.select_for_update().values_list("vendor_id", "status", "quantity").get(
+        id=purchase_order.id)
+
+
+def update_po_counters(before, after):
+    """
+    Apply the change of a purchase order to the denormalized counters of its vendor(s).
+
+    The counters are updated with F-expressions, so concurrent writes never overwrite each other. Call it
+    in the transaction writing the purchase order.
+
+    Args:
+        before (tuple): The counter_state of the purchase order before the write, or None when it was created.
+        after (tuple): The counter_state of the purchase order after the write, or None when it was deleted.
+    """
+    deltas = {}
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        vendor_id, status, quantity = state
+        vendor_deltas = deltas.setdefault(vendor_id, dict.fromkeys(PO_COUNTER_FIELDS, 0))
+        vendor_deltas["total_quantity"] += sign * quantity
+        if status in STATUS_COUNTER_FIELDS:
+            vendor_deltas[STATUS_COUNTER_FIELDS[status]] += sign
+
+    for vendor_id, vendor_deltas in deltas.items():
+        changes = {field: F(field) + delta for field, delta in vendor_deltas.items() if delta}
+        if changes:
+            Vendor.all_objects.filter(id=vendor_id).update(**changes, version=next_version())
@@ -0,0 +1,166 @@
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+# Ring buffer of the profiles of this process, the oldest one is evicted when it is full.
+_profiles = deque(maxlen=settings.PROFILING_BUFFER_SIZE)
+_profiles_lock = threading.Lock()
+_profile_ids = itertools.count(1)
+
+
+class StackSampler(threading.Thread):
+    """
+    StackSampler samples the call stack of one thread at a fixed interval into collapsed stacks.
+
+    Each sample is counted under its stack formatted as "module:function;module:function;...", outermost
+    frame first, which is the input format of flamegraph.pl and speedscope.
+
+    Attributes:
+        thread_id (int): The identifier of the sampled thread.
+        interval (float): Seconds between two samples.
+        stacks (Counter): The number of samples per collapsed stack.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            # co_qualname (Class.method) is only available from Python 3.11.
+            names.append(f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+class RequestProfiler:
+    """
+    RequestProfiler records the sampled call stacks and the SQL queries of a block of code.
+
+    SQL queries are grouped by statement, with their count and total time, on every configured database.
+
+    Attributes:
+        sampler (StackSampler): The sampler of the profiled thread.
+        sql (dict): Count and total seconds keyed by SQL statement.
+        duration (float): The wall-clock duration of the block, in seconds.
+    """
+
+    def __init__(self, interval):
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.sql = {}
+        self.duration = 0.0
+
+    def _execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            entry = self.sql.setdefault(sql, {"count": 0, "time": 0.0})
+            entry["count"] += 1
+            entry["time"] += time.perf_counter() - started
+
+    def __enter__(self):
+        self._wrappers = ExitStack()
+        for alias in connections:
+            self._wrappers.enter_context(connections[alias].execute_wrapper(self._execute))
+        self._started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self._started
+        self._wrappers.close()
+        return False
+
+
+def store_profile(request, response, profiler):
+    """
+    Store the profile of a request in the ring buffer of this process, evicting the oldest one when full.
+
+    Args:
+        request (HttpRequest): The profiled request.
+        response (HttpResponse): Its response.
+        profiler (RequestProfiler): The finished profiler.
+
+    Returns:
+        int: The ID of the stored profile.
+    """
+    sql = sorted(({"sql": statement, **entry} for statement, entry in profiler.sql.items()),
+                 key=lambda entry: entry["time"], reverse=True)
+    profile = {
+        "id": next(_profile_ids),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status_code": response.status_code,
+        "created_at": timezone.now(),
+        "duration": profiler.duration,
+        "samples": sum(profiler.sampler.stacks.values()),
+        "sql_queries": sum(entry["count"] for entry in sql),
+        "sql_time": sum(entry["time"] for entry in sql),
+        "sql": sql,
+        "stacks": profiler.sampler.stacks,
+    }
+    with _profiles_lock:
+        _profiles.append(profile)
+    return profile["id"]
+
+
+def get_profiles():
+    """
+    Get the profiles stored in this process, newest first.
+
+    Returns:
+        list: The stored profiles.
+    """
+    with _profiles_lock:
+        return list(reversed(_profiles))
+
+
+def get_profile(profile_id):
+    """
+    Get a stored profile by ID.
+
+    Args:
+        profile_id (int): The ID of the profile.
+
+    Returns:
+        dict: The profile, or None if it was evicted or never existed in this process.
+    """
+    return next((profile for profile in get_profiles() if profile["id"] == profile_id), None)
+
+
+def collapse_stacks(profile):
+    """
+    Format the sampled stacks of a profile as collapsed-stack lines for flame graph tools.
+
+    Args:
+        profile (dict): A stored profile.
+
+    Returns:
+        str: One "frame;frame;... count" line per distinct stack.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].most_common())
@@ -0,0 +1,113 @@
+import functools
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a block exceeds its query budget while QUERY_BUDGET_RAISE is enabled.
+    """
+
+
+class QueryBudget:
+    """
+    QueryBudget counts the database queries and database time spent inside a block and checks them against a budget.
+
+    Queries on every configured database are counted. When the block exceeds its budget, QueryBudgetExceeded
+    is raised if QUERY_BUDGET_RAISE is enabled, as the tests do; otherwise a warning is logged with the
+    measurements in its "query_budget" extra attribute. Budgets may be nested.
+
+    Attributes:
+        name (str): The name of the budget, reported when it is exceeded.
+        max_queries (int): The maximum number of queries.
+        max_db_time (float): The maximum time spent in the database, in seconds, or None for no limit.
+        queries (int): The number of queries executed so far.
+        db_time (float): The time spent in the database so far, in seconds.
+    """
+
+    def __init__(self, name, max_queries, max_db_time=None):
+        self.name = name
+        self.max_queries = max_queries
+        self.max_db_time = max_db_time
+        self.queries = 0
+        self.db_time = 0.0
+
+    def _execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def __enter__(self):
+        self._wrappers = ExitStack()
+        for alias in connections:
+            self._wrappers.enter_context(connections[alias].execute_wrapper(self._execute))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._wrappers.close()
+        if exc_type is None:
+            self.check()
+        return False
+
+    def check(self):
+        """
+        Raise or log a warning if the budget is exceeded.
+
+        Raises:
+            QueryBudgetExceeded: If the budget is exceeded and QUERY_BUDGET_RAISE is enabled.
+        """
+        over_queries = self.queries > self.max_queries
+        over_db_time = self.max_db_time is not None and self.db_time > self.max_db_time
+        if not (over_queries or over_db_time):
+            return
+
+        message = (f"Query budget {self.name!r} exceeded: {self.queries} queries (max {self.max_queries}), "
+                   f"{self.db_time * 1000:.1f} ms in the database (max {self._format_max_db_time()})")
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+
+        logger.warning(message, extra={"query_budget": {
+            "name": self.name,
+            "queries": self.queries,
+            "max_queries": self.max_queries,
+            "db_time": self.db_time,
+            "max_db_time": self.max_db_time,
+        }})
+
+    def _format_max_db_time(self):
+        return "none" if self.max_db_time is None else f"{self.max_db_time * 1000:.1f} ms"
+
+
+def query_budget(max_queries, max_db_time=None, name=None):
+    """
+    Declare the query budget of a function or view method.
+
+    Args:
+        max_queries (int): The maximum number of queries per call.
+        max_db_time (float): The maximum time spent in the database per call, in seconds, or None for no limit.
+        name (str): The name of the budget, defaults to the qualified name of the function.
+
+    Returns:
+        function: The decorator.
+    """
+
+    def decorator(function):
+        budget_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with QueryBudget(budget_name, max_queries, max_db_time):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
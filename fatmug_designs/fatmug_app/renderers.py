@@ -0,0 +1,54 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, fall back to the standard renderer.
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    FastJSONRenderer renders JSON with orjson when it is installed.
+
+    Types orjson does not handle natively (lazy strings, decimals, querysets, ...) are delegated to DRF's
+    JSONEncoder. Requests asking for indented output, or environments without orjson, use JSONRenderer.
+    """
+
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Datetimes are passed through to JSONEncoder to keep DRF's formatting.
+        return orjson.dumps(data, default=self._encoder.default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePackRenderer renders responses in the compact binary MessagePack format.
+
+    Clients select it with "Accept: application/msgpack" or "?format=msgpack". Values MessagePack cannot
+    represent natively are converted like JSONRenderer does. The msgpack package is optional: the settings
+    only list this renderer when it is installed.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # Imported on first use, so workers only serving JSON do not load it.
+        import msgpack
+
+        return msgpack.packb(data, default=self._encoder.default, datetime=False)
@@ -1,10 +1,14 @@
 # serializers.py
 
 from rest_framework import serializers
-from .models import Vendor, PurchaseOrder
+from .models import Vendor, PurchaseOrder, ChangeEvent, VendorForecast
+from django.db import models, transaction
 from django.utils import timezone
 import uuid
-from .track_performance import create_performance_metrics
+from .metric_workers import update_performance_metrics
+from .change_feed import record_change
+from .concurrency import check_expected_version, update_changed_fields
+from .po_counters import counter_state, locked_counter_state, update_po_counters
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 
@@ -79,9 +83,86 @@ class VendorSerializer(serializers.ModelSerializer):
             Vendor: The created Vendor instance.
         """
         vendor_code = str(uuid.uuid4().int % 10**6).zfill(6)
-        vendor = Vendor.objects.create(**validated_data, vendor_code=vendor_code)
+        with transaction.atomic():
+            vendor = Vendor.objects.create(**validated_data, vendor_code=vendor_code)
+            record_change(vendor, "created")
         return vendor
 
+    def update(self, instance, validated_data):
+        """
+        Override the update method to save only the changed fields and record the change in the change log.
+
+        With a version expected by the client (the "expected_version" context), the update is applied only if
+        the vendor still has that version. Otherwise it is applied only if the changed fields still hold the
+        values read by the request, so purchase order counter and metric updates in between do not conflict.
+
+        Args:
+            instance (Vendor): The existing Vendor instance.
+            validated_data (dict): Validated data for updating the Vendor instance.
+
+        Returns:
+            Vendor: The updated Vendor instance.
+
+        Raises:
+            VersionConflict: If the vendor was modified concurrently or does not have the expected version.
+        """
+        expected_version = self.context.get("expected_version")
+        check_expected_version(instance, expected_version)
+        changed = [key for key, value in validated_data.items() if getattr(instance, key) != value]
+        if not changed:
+            return instance
+
+        original = None if expected_version is not None else {key: getattr(instance, key) for key in changed}
+        for key in changed:
+            setattr(instance, key, validated_data[key])
+
+        with transaction.atomic():
+            # Write only the changed fields, leaving the concurrently maintained counters untouched.
+            update_changed_fields(instance, changed, original=original)
+            record_change(instance, "updated")
+        return instance
+
+class VendorRetrieveSerializer(VendorSerializer):
+    """
+    VendorRetrieveSerializer is a serializer for retrieving all the fields of a Vendor, including metadata.
+
+    Attributes:
+        model (Vendor): The Vendor model.
+        fields (str): All the fields of the model are included in the serialized data.
+    """
+
+    class Meta:
+        model = Vendor
+        fields = "__all__"
+        ref_name = "VendorRetrieveSerializer"
+
+class PerformanceMetricsSerializer(VendorSerializer):
+    """
+    PerformanceMetricsSerializer is a serializer for the performance metrics of a Vendor.
+
+    Attributes:
+        model (Vendor): The Vendor model.
+        fields (list): The performance metric fields included in the serialized data.
+    """
+
+    class Meta:
+        model = Vendor
+        fields = ["on_time_delivery_rate", "quality_rating_avg", "average_response_time", "fulfillment_rate"]
+
+class VendorForecastSerializer(serializers.ModelSerializer):
+    """
+    VendorForecastSerializer is a serializer for the delivery forecast of a Vendor.
+
+    Attributes:
+        model (VendorForecast): The VendorForecast model.
+        fields (list): The fields included in the serialized data.
+    """
+
+    class Meta:
+        model = VendorForecast
+        fields = ["on_time_probability", "expected_lead_time", "rolling_on_time_rate", "rolling_lead_time",
+                  "sample_size", "computed_at"]
+
 class PurchaseOrderSerializer(serializers.ModelSerializer):
     """
     PurchaseOrderSerializer is a serializer for the PurchaseOrder model.
@@ -110,6 +191,7 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrder
         fields = "__all__"
+        read_only_fields = ["version"]
 
     def create(self, validated_data):
         """
@@ -123,29 +205,44 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
         """
         status = validated_data.get("status")
         po_number = str(uuid.uuid4().int % 10**6).zfill(6)
-        purchase_order = PurchaseOrder.objects.create(**validated_data, po_number=po_number)
+        with transaction.atomic():
+            purchase_order = PurchaseOrder.objects.create(**validated_data, po_number=po_number)
+
+            if status == "complete":
+                purchase_order.acknowledgment_date = timezone.now()
+                purchase_order.save()
 
-        if status == "complete":
-            purchase_order.acknowledgment_date = timezone.now()
-            purchase_order.save()
+            update_po_counters(None, counter_state(purchase_order))
+            record_change(purchase_order, "created")
 
-        create_performance_metrics(purchase_order.vendor)
+        update_performance_metrics(purchase_order.vendor)
         return purchase_order
 
     def update(self, instance, validated_data):
         """
         Override the update method to handle status updates and performance metrics.
 
+        Only the changed fields are written, and only if the purchase order still has the version read by the
+        request, and the version expected by the client (the "expected_version" context) if any.
+
         Args:
             instance (PurchaseOrder): The existing PurchaseOrder instance.
             validated_data (dict): Validated data for updating the PurchaseOrder instance.
 
         Returns:
             PurchaseOrder: The updated PurchaseOrder instance.
+
+        Raises:
+            VersionConflict: If the purchase order was modified concurrently or does not have the expected version.
         """
-        if validated_data:
-            for key, value in validated_data.items():
-                setattr(instance, key, value)
+        check_expected_version(instance, self.context.get("expected_version"))
+        changed = [key for key, value in validated_data.items() if getattr(instance, key) != value]
+        for key in changed:
+            setattr(instance, key, validated_data[key])
+
+        if "items" in changed:
+            instance.update_quantity()
+            changed.append("quantity")
 
         if "status" in validated_data.keys():
             status = validated_data.get("status")
@@ -153,8 +250,170 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
                 instance.acknowledgment_date = timezone.now()
             else:
                 instance.acknowledgment_date = None
+            changed.append("acknowledgment_date")
+
+        if not changed:
+            return instance
 
-            instance.save()
+        with transaction.atomic():
+            before = locked_counter_state(instance)
+            update_changed_fields(instance, changed)
+            update_po_counters(before, counter_state(instance))
+            record_change(instance, "updated")
 
-        create_performance_metrics(instance.vendor)
+        update_performance_metrics(instance.vendor)
         return instance
+
+class ChangeEventSerializer(serializers.ModelSerializer):
+    """
+    ChangeEventSerializer is a serializer for the ChangeEvent model.
+
+    Attributes:
+        model (ChangeEvent): The ChangeEvent model.
+        fields (list): The fields included in the serialized data.
+    """
+
+    class Meta:
+        model = ChangeEvent
+        fields = ["id", "entity", "object_id", "action", "payload", "created_at"]
+
+class ValuesSerializer:
+    """
+    ValuesSerializer is a read-only serializer building representations straight from ``values_list()`` rows.
+
+    It skips model instantiation and per-field serializer objects for large listings. The lookups and
+    the conversion plan are computed once per subclass; datetimes are rendered like DRF's DateTimeField.
+
+    Attributes:
+        model (Model): The model the lookups are resolved against.
+        fields (tuple): Pairs of (output key, ORM lookup), in output order. A tuple of pairs in place of
+            the lookup produces a nested object.
+    """
+
+    model = None
+    fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._lookups = []
+        cls._plan = cls._build_plan(cls.fields)
+
+    @classmethod
+    def _build_plan(cls, fields):
+        plan = []
+        for key, source in fields:
+            if isinstance(source, tuple):
+                plan.append((key, None, cls._build_plan(source)))
+            else:
+                plan.append((key, len(cls._lookups), cls._get_converter(source)))
+                cls._lookups.append(source)
+        return plan
+
+    @classmethod
+    def _get_converter(cls, lookup):
+        model = cls.model
+        for part in lookup.split("__"):
+            field = model._meta.get_field(part)
+            model = field.related_model
+        if isinstance(field, models.DateTimeField):
+            return serializers.DateTimeField().to_representation
+        return None
+
+    @classmethod
+    def _build_row(cls, plan, row):
+        data = {}
+        for key, index, converter in plan:
+            if index is None:
+                data[key] = cls._build_row(converter, row)
+            else:
+                value = row[index]
+                data[key] = converter(value) if converter is not None and value is not None else value
+        return data
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @property
+    def data(self):
+        """
+        Serialize every row of the queryset.
+
+        Returns:
+            list: A list of dictionaries with the same layout as the equivalent ModelSerializer output.
+        """
+        plan = self._plan
+        return [self._build_row(plan, row) for row in self.queryset.values_list(*self._lookups)]
+
+class VendorValuesSerializer(ValuesSerializer):
+    """
+    VendorValuesSerializer is the fast read path equivalent of VendorSerializer for vendor listings.
+    """
+
+    model = Vendor
+    fields = (
+        ("id", "id"),
+        ("name", "name"),
+        ("contact_details", "contact_details"),
+        ("address", "address"),
+    )
+
+class VendorListValuesSerializer(ValuesSerializer):
+    """
+    VendorListValuesSerializer serializes vendor listings together with their denormalized purchase order counters.
+    """
+
+    model = Vendor
+    fields = VendorValuesSerializer.fields + (
+        ("open_po_count", "open_po_count"),
+        ("completed_po_count", "completed_po_count"),
+        ("canceled_po_count", "canceled_po_count"),
+        ("total_quantity", "total_quantity"),
+    )
+
+class PurchaseOrderValuesSerializer(ValuesSerializer):
+    """
+    PurchaseOrderValuesSerializer is the fast read path equivalent of PurchaseOrderSerializer for listings.
+
+    The vendor details are fetched through a join in the same query instead of one query per row.
+    """
+
+    model = PurchaseOrder
+    fields = (
+        ("id", "id"),
+        ("vendor_details", tuple((key, f"vendor__{lookup}") for key, lookup in VendorValuesSerializer.fields)),
+        ("po_number", "po_number"),
+        ("order_date", "order_date"),
+        ("delivery_date", "delivery_date"),
+        ("items", "items"),
+        ("quantity", "quantity"),
+        ("status", "status"),
+        ("quality_rating", "quality_rating"),
+        ("issue_date", "issue_date"),
+        ("acknowledgment_date", "acknowledgment_date"),
+        ("version", "version"),
+        ("vendor", "vendor"),
+    )
+
+class NormalizedPurchaseOrderValuesSerializer(ValuesSerializer):
+    """
+    NormalizedPurchaseOrderValuesSerializer serializes purchase order listings with each vendor emitted once.
+
+    The rows carry only the vendor ID; the vendor details are returned once per vendor in a side table
+    instead of being repeated in every row.
+    """
+
+    model = PurchaseOrder
+    fields = tuple(field for field in PurchaseOrderValuesSerializer.fields if field[0] != "vendor_details")
+
+    @property
+    def data(self):
+        """
+        Serialize the purchase orders and the vendors they reference.
+
+        Returns:
+            dict: The "purchase_orders" rows and the "vendors" side table.
+        """
+        purchase_orders = super().data
+        vendor_ids = {purchase_order["vendor"] for purchase_order in purchase_orders}
+        vendors = VendorValuesSerializer(Vendor.all_objects.filter(id__in=vendor_ids).order_by("id")).data
+        return {"vendors": vendors, "purchase_orders": purchase_orders}
@@ -1,3 +1,1056 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from importlib import import_module
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import Avg, ExpressionWrapper, F, fields
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from .archive import archive_purchase_order_batch, purge_vendor
+from .change_feed import GAP_TIMEOUT, read_changes
+from .concurrency import VersionConflict
+from .idempotency import _request_hash
+from .management.commands.reconcile_po_counters import count_purchase_orders
+from .metric_workers import MetricWorker, update_performance_metrics
+from .middleware import brotli
+from .models import (
+    Vendor,
+    PurchaseOrder,
+    HistoricalPerformance,
+    VendorArchiveAggregate,
+    VendorForecast,
+    ChangeEvent,
+    IdempotencyKey,
+    PendingMetricUpdate,
+)
+from .po_counters import PO_COUNTER_FIELDS, counter_state, update_po_counters
+from .profiling import StackSampler, get_profiles
+from .query_budget import QueryBudget, QueryBudgetExceeded, query_budget
+from .renderers import FastJSONRenderer
+from .serializers import (
+    PurchaseOrderSerializer,
+    PurchaseOrderValuesSerializer,
+    VendorListValuesSerializer,
+    VendorSerializer,
+)
+from .throttling import (
+    LOCK_TIMEOUT_COUNTER_PREFIX,
+    THROTTLE_COUNTER_PREFIX,
+    ConcurrencyLimiter,
+    ScopedTokenBucketThrottle,
+    get_rejection_counts,
+    record_rejection,
+)
+from .track_performance import take_performance_snapshots
+from .trends import get_performance_trend
+
+User = get_user_model()
+
+
+class APITestMixin:
+    """
+    Helpers shared by the API tests: an admin user authenticated with a JWT access token, and factories.
+    """
+
+    client_class = APIClient
+
+    def setUp(self):
+        super().setUp()
+        # Throttle buckets and rejection counters live in the cache.
+        cache.clear()
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.refresh_token = RefreshToken.for_user(self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.refresh_token.access_token}")
+
+    def create_vendor(self, name="Vendor"):
+        return Vendor.objects.create(name=name, contact_details="contact", address="address", vendor_code="000001")
+
+    def create_purchase_order(self, vendor, status="pending", quantity=1, **fields):
+        now = timezone.now()
+        fields = {"order_date": now - timedelta(days=2), "delivery_date": now + timedelta(days=3), **fields}
+        return PurchaseOrder.objects.create(vendor=vendor, po_number="000001", status=status,
+                                            items=[{"name": "item", "quantity": quantity}], **fields)
+
+    def purchase_order_payload(self, vendor, **fields):
+        return {
+            "vendor": vendor.id,
+            "order_date": "2024-01-01T00:00:00Z",
+            "delivery_date": "2024-01-05T00:00:00Z",
+            "items": [{"name": "item", "quantity": 3}],
+            "status": "pending",
+            **fields,
+        }
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class QueryBudgetEndpointTests(APITestMixin, APITestCase):
+    """
+    Call every endpoint with QUERY_BUDGET_RAISE enabled, so a handler exceeding its budget fails the test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.create_vendor()
+        self.purchase_order = self.create_purchase_order(self.vendor)
+        self.create_purchase_order(self.vendor, status="complete", quality_rating=4,
+                                   acknowledgment_date=timezone.now())
+
+    def assertWithinBudget(self, response, status_code=200):
+        # Views turn unexpected exceptions into 500 responses, so check the status as well.
+        self.assertEqual(response.status_code, status_code, getattr(response, "data", None))
+
+    def test_token_endpoints(self):
+        self.client.credentials()
+        response = self.client.post("/api/admin-tokens/", {"username": "admin", "password": "password"})
+        self.assertWithinBudget(response)
+        response = self.client.post("/api/admin_refresh_token/", {"refresh": str(self.refresh_token)})
+        self.assertWithinBudget(response)
+
+    def test_vendor_endpoints(self):
+        vendor = {"name": "New vendor", "contact_details": "contact", "address": "address"}
+        self.assertWithinBudget(self.client.post("/api/vendors/", vendor, format="json"), 201)
+        self.assertWithinBudget(self.client.post("/api/vendors/", vendor, format="json", HTTP_IDEMPOTENCY_KEY="key"),
+                                201)
+        self.assertWithinBudget(self.client.get("/api/vendors/"))
+        self.assertWithinBudget(self.client.get(f"/api/vendors/{self.vendor.id}"))
+        self.assertWithinBudget(self.client.put(f"/api/vendors/{self.vendor.id}", {"name": "Renamed"}, format="json"))
+        self.assertWithinBudget(self.client.get(f"/api/vendors/{self.vendor.id}/performance"))
+        self.assertWithinBudget(self.client.delete(f"/api/vendors/{self.vendor.id}"))
+
+    def test_vendor_read_endpoints_with_history(self):
+        HistoricalPerformance.objects.bulk_create([HistoricalPerformance(vendor=self.vendor, on_time_delivery_rate=i)
+                                                   for i in range(20)])
+        VendorForecast.objects.create(vendor=self.vendor, on_time_probability=0.5, expected_lead_time=2,
+                                      rolling_on_time_rate=0.5, rolling_lead_time=2, sample_size=1)
+        self.assertWithinBudget(self.client.get(f"/api/vendors/{self.vendor.id}/performance/trend?points=5"))
+        self.assertWithinBudget(self.client.get(f"/api/vendors/{self.vendor.id}/forecast"))
+
+    def test_purchase_order_endpoints(self):
+        payload = self.purchase_order_payload(self.vendor)
+        self.assertWithinBudget(self.client.post("/api/purchase_orders/", payload, format="json"), 201)
+        completed = self.purchase_order_payload(self.vendor, status="complete", quality_rating=5)
+        self.assertWithinBudget(self.client.post("/api/purchase_orders/", completed, format="json",
+                                                 HTTP_IDEMPOTENCY_KEY="key"), 201)
+        self.assertWithinBudget(self.client.get("/api/purchase_orders/"))
+        self.assertWithinBudget(self.client.get("/api/purchase_orders/?shape=normalized"))
+        self.assertWithinBudget(self.client.get(f"/api/purchase_orders/?vendor_id={self.vendor.id}"))
+        self.assertWithinBudget(self.client.get(f"/api/purchase_orders/{self.purchase_order.id}"))
+        self.assertWithinBudget(self.client.put(f"/api/purchase_orders/{self.purchase_order.id}",
+                                                {"quality_rating": 3}, format="json"))
+        self.assertWithinBudget(self.client.post(f"/api/purchase_orders/{self.purchase_order.id}/acknowledge"))
+        self.assertWithinBudget(self.client.put(f"/api/purchase_orders/{self.purchase_order.id}",
+                                                {"status": "canceled"}, format="json"))
+        self.assertWithinBudget(self.client.delete(f"/api/purchase_orders/{self.purchase_order.id}"))
+
+    def test_monitoring_endpoints(self):
+        self.assertWithinBudget(self.client.get("/api/changes/?since=0&limit=10"))
+        self.assertWithinBudget(self.client.get("/api/admission-stats/"))
+
+        response = self.client.get("/api/vendors/", HTTP_X_PROFILE="1")
+        profile_id = response.headers["X-Profile-Id"]
+        self.assertWithinBudget(self.client.get("/api/profiles/"))
+        self.assertWithinBudget(self.client.get(f"/api/profiles/{profile_id}"))
+        self.assertWithinBudget(self.client.get(f"/api/profiles/{profile_id}/collapsed"))
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Check the enforcement of query budgets.
+    """
+
+    def run_queries(self, count):
+        with connection.cursor() as cursor:
+            for _ in range(count):
+                cursor.execute("SELECT 1")
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_exceeded_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with QueryBudget("test", max_queries=1):
+                self.run_queries(2)
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_decorated_function_exceeding_budget_raises(self):
+        decorated = query_budget(max_queries=2)(self.run_queries)
+        decorated(2)
+        with self.assertRaises(QueryBudgetExceeded):
+            decorated(3)
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_exceeded_budget_logs_warning(self):
+        with self.assertLogs("fatmug_app.query_budget", "WARNING") as logs:
+            with QueryBudget("test", max_queries=0) as budget:
+                self.run_queries(1)
+        self.assertEqual(budget.queries, 1)
+        self.assertEqual(logs.records[0].query_budget["max_queries"], 0)
+
+
+class RebuildPerformanceMetricsTests(APITestMixin, APITestCase):
+    """
+    Check the grouped-aggregate rebuild against the original per-vendor computation of the metrics.
+    """
+
+    def reference_metrics(self, vendor):
+        # The per-vendor queries of the original create_performance_metrics.
+        purchase_orders = PurchaseOrder.objects.filter(vendor_id=vendor.id)
+        completed_orders = purchase_orders.filter(status="complete")
+        on_time = completed_orders.filter(delivery_date__gte=F("acknowledgment_date")).count()
+        response_time = purchase_orders.filter(acknowledgment_date__isnull=False).aggregate(average=Avg(
+            ExpressionWrapper(F("acknowledgment_date") - F("order_date"), output_field=fields.DurationField())
+        ))["average"]
+        return {
+            "on_time_delivery_rate": on_time / completed_orders.count() * 100,
+            "quality_rating_avg": round(purchase_orders.aggregate(average=Avg("quality_rating"))["average"], 2),
+            "average_response_time": round(response_time.total_seconds() // (24 * 3600), 2),
+            "fulfillment_rate": round(completed_orders.count() / purchase_orders.count() * 100, 2),
+        }
+
+    def rebuild(self, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command("rebuild_performance_metrics", *args, "--checkpoint", str(Path(directory) / "checkpoint"),
+                         stdout=StringIO())
+
+    def test_rebuild_matches_per_vendor_computation(self):
+        now = timezone.now()
+        vendors = [self.create_vendor(f"Vendor {i}") for i in range(5)]
+        for i, vendor in enumerate(vendors):
+            for j in range(i + 3):
+                order_date = now - timedelta(days=10 + j)
+                acknowledged = order_date + timedelta(days=j % 4 + 1)
+                self.create_purchase_order(
+                    vendor, status="complete" if j % 3 else "pending", quantity=j + 1, quality_rating=(i + j) % 5 + 1,
+                    order_date=order_date, delivery_date=order_date + timedelta(days=2),
+                    acknowledgment_date=acknowledged)
+
+        self.rebuild("--chunk-size", "2")
+
+        for vendor in vendors:
+            vendor.refresh_from_db()
+            for field, value in self.reference_metrics(vendor).items():
+                self.assertAlmostEqual(getattr(vendor, field), value, places=6, msg=f"{vendor.name} {field}")
+
+    def test_history_is_only_written_on_request(self):
+        vendor = self.create_vendor()
+        self.create_purchase_order(vendor, status="complete", acknowledgment_date=timezone.now())
+
+        self.rebuild()
+        self.assertFalse(HistoricalPerformance.objects.exists())
+        Vendor.objects.update(fulfillment_rate=0)
+        self.rebuild("--history")
+        self.assertEqual(HistoricalPerformance.objects.filter(vendor=vendor).count(), 1)
+
+    def test_unchanged_vendors_keep_their_version(self):
+        changed, unchanged = self.create_vendor("Changed"), self.create_vendor("Unchanged")
+        for vendor in (changed, unchanged):
+            self.create_purchase_order(vendor, status="complete", acknowledgment_date=timezone.now())
+        self.rebuild()
+        Vendor.objects.filter(id=changed.id).update(fulfillment_rate=0)
+        versions = dict(Vendor.objects.values_list("id", "version"))
+        snapshots = {vendor.id: HistoricalPerformance.objects.filter(vendor=vendor).count()
+                     for vendor in (changed, unchanged)}
+
+        self.rebuild("--history")
+
+        changed.refresh_from_db()
+        unchanged.refresh_from_db()
+        self.assertEqual(changed.fulfillment_rate, 100)
+        self.assertEqual(changed.version, versions[changed.id] + 1)
+        self.assertEqual(unchanged.version, versions[unchanged.id])
+        self.assertEqual(HistoricalPerformance.objects.filter(vendor=unchanged).count(), snapshots[unchanged.id])
+        self.assertEqual(HistoricalPerformance.objects.filter(vendor=changed).count(), snapshots[changed.id] + 1)
+
+    def test_snapshots_record_changed_and_new_vendors(self):
+        changed, unchanged = self.create_vendor("Changed"), self.create_vendor("Unchanged")
+        HistoricalPerformance.objects.all().delete()
+        # Two reads and one bulk insert.
+        with self.assertNumQueries(3):
+            self.assertEqual(take_performance_snapshots(), (2, 0))
+
+        Vendor.objects.filter(id=changed.id).update(quality_rating_avg=4.5)
+        new = self.create_vendor("New")
+        with self.assertNumQueries(3):
+            self.assertEqual(take_performance_snapshots(), (2, 1))
+
+        counts = {vendor.id: HistoricalPerformance.objects.filter(vendor=vendor).count()
+                  for vendor in (changed, unchanged, new)}
+        self.assertEqual(counts, {changed.id: 2, unchanged.id: 1, new.id: 1})
+        latest = HistoricalPerformance.objects.filter(vendor=changed).latest("id")
+        self.assertEqual(latest.quality_rating_avg, 4.5)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(take_performance_snapshots(), (0, 3))
+
+    def test_snapshot_interval_must_be_positive(self):
+        for interval in ("0", "-5"):
+            with self.assertRaises(CommandError):
+                call_command("snapshot_performance", "--interval", interval)
+
+    def test_chunk_size_must_be_positive(self):
+        for command in ("rebuild_performance_metrics", "compute_delivery_forecasts", "reconcile_po_counters"):
+            with self.assertRaises(CommandError):
+                call_command(command, "--chunk-size", "0")
+
+    def test_workers_must_not_be_negative(self):
+        with self.assertRaises(CommandError):
+            call_command("rebuild_performance_metrics", "--workers", "-1")
+
+
+class ValuesSerializerTests(APITestMixin, APITestCase):
+    """
+    Check that the values_list() listing serializers render the same bytes as the ModelSerializers they replace.
+    """
+
+    def assertSameJSON(self, fast, reference):
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            self.assertEqual(renderer.render(fast), renderer.render(reference), type(renderer).__name__)
+
+    def test_purchase_orders_match_model_serializer(self):
+        vendors = [self.create_vendor("Vendor A"), self.create_vendor("Vendor B")]
+        issued = timezone.now().replace(microsecond=123456)
+        self.create_purchase_order(vendors[0])
+        self.create_purchase_order(vendors[0], status="complete", quality_rating=4.5, issue_date=issued,
+                                   acknowledgment_date=issued + timedelta(hours=1, microseconds=7))
+        self.create_purchase_order(vendors[1], status="canceled", order_date=issued.replace(microsecond=0))
+
+        purchase_orders = PurchaseOrder.objects.order_by("id")
+        fast = PurchaseOrderValuesSerializer(purchase_orders).data
+        self.assertIsNone(fast[0]["quality_rating"])
+        self.assertIsNone(fast[0]["acknowledgment_date"])
+        self.assertEqual(fast[2]["vendor_details"]["name"], "Vendor B")
+        self.assertSameJSON(fast, PurchaseOrderSerializer(purchase_orders, many=True).data)
+
+    def test_vendor_listing_matches_model_serializer(self):
+        vendor = self.create_vendor()
+        self.create_purchase_order(vendor, quantity=5)
+        self.create_vendor("Without orders")
+
+        vendors = Vendor.objects.order_by("id")
+        reference = [
+            {**VendorSerializer(vendor).data, **{field: getattr(vendor, field) for field in (
+                "open_po_count", "completed_po_count", "canceled_po_count", "total_quantity")}}
+            for vendor in vendors
+        ]
+        self.assertSameJSON(VendorListValuesSerializer(vendors).data, reference)
+
+
+class DeliveryForecastTests(APITestMixin, APITestCase):
+    """
+    Check that the delivery forecasts carry archived purchase orders forward and skip deleted vendors.
+    """
+
+    def forecasts(self):
+        call_command("compute_delivery_forecasts", "--window", "5", "--halflife", "3", stdout=StringIO())
+        return {forecast.vendor_id: forecast for forecast in VendorForecast.objects.all()}
+
+    def test_archived_deliveries_keep_the_forecast(self):
+        now = timezone.now()
+        vendor = self.create_vendor()
+        # Identical old deliveries, which the archive can summarize without loss.
+        for days in range(40, 52):
+            order_date = now - timedelta(days=days)
+            self.create_purchase_order(vendor, status="complete", order_date=order_date,
+                                       delivery_date=order_date + timedelta(days=2),
+                                       acknowledgment_date=order_date + timedelta(days=3))
+        for days, lead_time in ((5, 1), (4, 4), (3, 2)):
+            order_date = now - timedelta(days=days)
+            self.create_purchase_order(vendor, order_date=order_date, delivery_date=order_date + timedelta(days=2),
+                                       acknowledgment_date=order_date + timedelta(days=lead_time))
+
+        before = self.forecasts()[vendor.id]
+        self.assertEqual(archive_purchase_order_batch(now - timedelta(days=30), 100), 12)
+        after = self.forecasts()[vendor.id]
+
+        self.assertEqual(after.sample_size, before.sample_size)
+        for field in ("on_time_probability", "expected_lead_time", "rolling_on_time_rate", "rolling_lead_time"):
+            self.assertAlmostEqual(getattr(after, field), getattr(before, field), delta=0.01, msg=field)
+
+    def test_deleted_vendor_is_not_forecast(self):
+        vendors = [self.create_vendor(f"Vendor {i}") for i in range(3)]
+        for vendor in vendors:
+            self.create_purchase_order(vendor, acknowledgment_date=timezone.now())
+        self.client.delete(f"/api/vendors/{vendors[1].id}")
+
+        self.assertEqual(set(self.forecasts()), {vendors[0].id, vendors[2].id})
+
+
+class ChangeFeedTests(APITestMixin, APITestCase):
+    """
+    Check the change feed cursor, its parameter validation and the events of bulk removals.
+    """
+
+    def test_invalid_parameters_are_rejected(self):
+        for query in ("limit=-1", "limit=0", "limit=x", "since=-1", "wait=-1", "since=x"):
+            response = self.client.get(f"/api/changes/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_cursor_reads_events_in_batches(self):
+        vendor = {"name": "Vendor", "contact_details": "contact", "address": "address"}
+        for _ in range(3):
+            self.client.post("/api/vendors/", vendor, format="json")
+
+        response = self.client.get("/api/changes/?limit=2")
+        self.assertEqual([event["action"] for event in response.data["events"]], ["created", "created"])
+        response = self.client.get(f"/api/changes/?since={response.data['next']}&limit=2")
+        self.assertEqual(len(response.data["events"]), 1)
+        response = self.client.get(f"/api/changes/?since={response.data['next']}")
+        self.assertEqual(response.data["events"], [])
+
+    @override_settings(CHANGE_FEED_MAX_WAIT=0)
+    def test_long_poll_is_capped_by_setting(self):
+        started = timezone.now()
+        response = self.client.get("/api/changes/?wait=30")
+        self.assertEqual(response.data["events"], [])
+        self.assertLess(timezone.now() - started, timedelta(seconds=5))
+
+    def test_recent_gap_stops_the_feed(self):
+        vendor = self.create_vendor()
+        first, missing, last = [ChangeEvent.objects.create(entity="vendor", object_id=vendor.id, action="updated")
+                                for _ in range(3)]
+        # A missing sequence number is an event whose transaction may not have committed yet.
+        missing.delete()
+        self.assertEqual(read_changes(0, 10), [first])
+
+        # Once the following event is older than the timeout, the gap is a rolled-back transaction.
+        ChangeEvent.objects.filter(id=last.id).update(created_at=timezone.now() - GAP_TIMEOUT * 2)
+        self.assertEqual(read_changes(0, 10), [first, last])
+
+    def test_archive_and_purge_record_deletions(self):
+        vendor = self.create_vendor()
+        archived = self.create_purchase_order(vendor, status="complete", acknowledgment_date=timezone.now(),
+                                              order_date=timezone.now() - timedelta(days=400))
+        purged = self.create_purchase_order(vendor)
+
+        archive_purchase_order_batch(timezone.now() - timedelta(days=365), 10)
+        vendor.deleted_at = timezone.now()
+        vendor.save()
+        purge_vendor(vendor, 10)
+
+        events = ChangeEvent.objects.filter(entity="purchaseorder", action="deleted").order_by("id")
+        self.assertEqual([(event.object_id, event.payload["reason"]) for event in events],
+                         [(archived.id, "archived"), (purged.id, "vendor_purged")])
+
+
+@override_settings(READ_REPLICA_DATABASE="replica")
+class ReadReplicaTests(APITestMixin, APITransactionTestCase):
+    """
+    Check that reads of the read-heavy endpoints go to the replica, except for clients reading their own writes.
+
+    The replica is a test mirror of the default database with its own connection, which only sees committed rows.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.create_vendor()
+        self.create_purchase_order(self.vendor)
+
+    def read_queries(self, url, **headers):
+        with CaptureQueriesContext(connections["default"]) as default, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            self.assertEqual(self.client.get(url, **headers).status_code, 200)
+        return len(default), len(replica)
+
+    def test_reads_go_to_the_replica(self):
+        for url in ("/api/vendors/", f"/api/vendors/{self.vendor.id}", "/api/purchase_orders/",
+                    f"/api/vendors/{self.vendor.id}/performance"):
+            default, replica = self.read_queries(url)
+            # Only the user is loaded from the primary, by the authentication.
+            self.assertEqual(default, 1, url)
+            self.assertGreater(replica, 0, url)
+
+    def test_writes_make_the_client_read_the_primary(self):
+        response = self.client.put(f"/api/vendors/{self.vendor.id}", {"name": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[settings.READ_PRIMARY_COOKIE].value, "1")
+        self.assertEqual(response.cookies[settings.READ_PRIMARY_COOKIE]["max-age"], settings.READ_PRIMARY_SECONDS)
+
+        default, replica = self.read_queries(f"/api/vendors/{self.vendor.id}")
+        self.assertGreater(default, 1)
+        self.assertEqual(replica, 0)
+
+    def test_failed_writes_do_not_set_the_cookie(self):
+        response = self.client.put("/api/vendors/0", {"name": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn(settings.READ_PRIMARY_COOKIE, response.cookies)
+
+    def test_header_forces_the_primary(self):
+        default, replica = self.read_queries("/api/purchase_orders/", HTTP_X_READ_PRIMARY="1")
+        self.assertGreater(default, 1)
+        self.assertEqual(replica, 0)
+
+
+class SoftDeleteTests(APITestMixin, APITestCase):
+    """
+    Check that vendors deleted through the API and their purchase orders cannot be read or written.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.create_vendor()
+        self.purchase_order = self.create_purchase_order(self.vendor)
+
+    def test_deleted_vendor_purchase_orders_are_not_found(self):
+        self.assertEqual(self.client.delete(f"/api/vendors/{self.vendor.id}").status_code, 200)
+
+        url = f"/api/purchase_orders/{self.purchase_order.id}"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.put(url, {"quality_rating": 2}, format="json").status_code, 404)
+        self.assertEqual(self.client.post(f"{url}/acknowledge").status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(self.client.get(f"/api/vendors/{self.vendor.id}").status_code, 404)
+        self.assertEqual(self.client.put(f"/api/vendors/{self.vendor.id}", {"name": "x"}, format="json").status_code,
+                         404)
+        response = self.client.get(f"/api/vendors/{self.vendor.id}/performance")
+        self.assertEqual((response.status_code, response.json()), (404, {"error": "Vendor not found"}))
+
+        self.purchase_order.refresh_from_db()
+        self.assertEqual(self.purchase_order.status, "pending")
+        self.assertIsNone(self.purchase_order.quality_rating)
+
+    def test_purge_batch_size_must_be_positive(self):
+        for command in ("purge_deleted_vendors", "archive_purchase_orders"):
+            with self.assertRaises(CommandError):
+                call_command(command, "--batch-size", "0")
+        with self.assertRaises(CommandError):
+            call_command("archive_purchase_orders", "--days", "-1")
+
+    def test_delete_increments_version_and_checks_if_match(self):
+        url = f"/api/vendors/{self.vendor.id}"
+        self.assertEqual(self.client.delete(url, HTTP_IF_MATCH='"2"').status_code, 412)
+        self.assertEqual(self.client.delete(url, HTTP_IF_MATCH='"1"').status_code, 200)
+
+        vendor = Vendor.all_objects.get(id=self.vendor.id)
+        self.assertIsNotNone(vendor.deleted_at)
+        self.assertEqual(vendor.version, 2)
+
+
+class OptimisticConcurrencyTests(APITestMixin, APITestCase):
+    """
+    Check the versioned updates of vendors and purchase orders: 412 for a stale If-Match or expected_version, and
+    409 for a concurrent write between the request's own read and write.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.create_vendor()
+        self.purchase_order = self.create_purchase_order(self.vendor)
+        self.url = f"/api/purchase_orders/{self.purchase_order.id}"
+
+    def test_stale_version_fails_precondition(self):
+        response = self.client.put(self.url, {"quality_rating": 3}, format="json", HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], '"2"')
+
+        response = self.client.put(self.url, {"quality_rating": 4}, format="json", HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 412)
+        response = self.client.put(self.url, {"quality_rating": 4, "expected_version": 1}, format="json")
+        self.assertEqual(response.status_code, 412)
+        self.purchase_order.refresh_from_db()
+        self.assertEqual((self.purchase_order.quality_rating, self.purchase_order.version), (3, 2))
+
+    def test_concurrent_write_conflicts(self):
+        def concurrent_write(instance, expected_version):
+            # Another request writes the purchase order after this one read it.
+            PurchaseOrder.objects.filter(id=instance.id).update(version=F("version") + 1)
+
+        with mock.patch("fatmug_app.serializers.check_expected_version", side_effect=concurrent_write):
+            response = self.client.put(self.url, {"quality_rating": 3}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.purchase_order.refresh_from_db()
+        self.assertIsNone(self.purchase_order.quality_rating)
+
+    def test_vendor_update_ignores_concurrent_counter_updates(self):
+        def purchase_order_write(instance, expected_version):
+            # A purchase order write updates the counters of the vendor after this request read it.
+            Vendor.objects.filter(id=instance.id).update(open_po_count=F("open_po_count") + 1,
+                                                         version=F("version") + 1)
+
+        url = f"/api/vendors/{self.vendor.id}"
+        with mock.patch("fatmug_app.serializers.check_expected_version", side_effect=purchase_order_write):
+            response = self.client.put(url, {"name": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], self.client.get(url).headers["ETag"])
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.name, "Renamed")
+        self.assertEqual(self.vendor.version, 3)
+
+        def vendor_write(instance, expected_version):
+            # Another request renames the vendor after this one read it.
+            Vendor.objects.filter(id=instance.id).update(name="Concurrent", version=F("version") + 1)
+
+        with mock.patch("fatmug_app.serializers.check_expected_version", side_effect=vendor_write):
+            response = self.client.put(url, {"name": "Mine"}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.name, "Concurrent")
+
+    def test_counter_and_metric_updates_change_vendor_etag(self):
+        etag = self.client.get(f"/api/vendors/{self.vendor.id}").headers["ETag"]
+        self.client.post(f"{self.url}/acknowledge")
+        self.assertNotEqual(self.client.get(f"/api/vendors/{self.vendor.id}").headers["ETag"], etag)
+
+        response = self.client.put(f"/api/vendors/{self.vendor.id}", {"name": "Renamed"}, format="json",
+                                   HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+
+        # Metrics drifted, e.g. after a change of the formulas, are rewritten by a rebuild.
+        Vendor.objects.filter(id=self.vendor.id).update(on_time_delivery_rate=0)
+        etag = self.client.get(f"/api/vendors/{self.vendor.id}").headers["ETag"]
+        with tempfile.TemporaryDirectory() as directory:
+            call_command("rebuild_performance_metrics", "--checkpoint", str(Path(directory) / "checkpoint"),
+                         stdout=StringIO())
+        self.assertNotEqual(self.client.get(f"/api/vendors/{self.vendor.id}").headers["ETag"], etag)
+
+
+class PerformanceTrendTests(APITestMixin, APITestCase):
+    """
+    Check the downsampling of performance trends and their concurrency pool.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.create_vendor()
+        values = [50 + i % 7 for i in range(100)]
+        values[37], values[71] = 1000, -1000
+        HistoricalPerformance.objects.bulk_create(
+            [HistoricalPerformance(vendor=self.vendor, on_time_delivery_rate=value) for value in values])
+        start = timezone.now() - timedelta(days=100)
+        for i, snapshot in enumerate(HistoricalPerformance.objects.order_by("id")):
+            HistoricalPerformance.objects.filter(id=snapshot.id).update(date=start + timedelta(days=i))
+        self.values = values
+
+    def test_lttb_keeps_the_endpoints(self):
+        total, points = get_performance_trend(self.vendor.id, "on_time_delivery_rate", points=10)
+        self.assertEqual(total, 100)
+        self.assertLessEqual(len(points), 10)
+        self.assertEqual((points[0][1], points[-1][1]), (self.values[0], self.values[-1]))
+        self.assertEqual(points, sorted(points))
+
+    def test_min_max_keeps_the_extremes(self):
+        total, points = get_performance_trend(self.vendor.id, "on_time_delivery_rate", points=10, method="minmax")
+        self.assertLessEqual(len(points), 10)
+        values = [value for _, value, _ in points]
+        self.assertIn(1000, values)
+        self.assertIn(-1000, values)
+        self.assertEqual(points, sorted(points))
+
+    def test_trends_have_their_own_concurrency_pool(self):
+        limiter = ConcurrencyLimiter.get("trends")
+        acquired = [limiter.acquire() for _ in range(limiter.limit)]
+        try:
+            self.assertTrue(all(acquired))
+            response = self.client.get(f"/api/vendors/{self.vendor.id}/performance/trend")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(self.client.get("/api/vendors/").status_code, 200)
+        finally:
+            for _ in acquired:
+                limiter.release()
+        self.assertEqual(self.client.get("/api/admission-stats/").json()["shed"]["trends"], 1)
+
+
+class PurchaseOrderCounterTests(APITestMixin, APITestCase):
+    """
+    Check the denormalized purchase order counters of vendors against a recount after each kind of write.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.create_vendor()
+
+    def assertCounters(self, **expected):
+        self.vendor.refresh_from_db()
+        stored = {field: getattr(self.vendor, field) for field in PO_COUNTER_FIELDS}
+        self.assertEqual(stored, {**dict.fromkeys(PO_COUNTER_FIELDS, 0), **expected})
+        self.assertEqual(stored, count_purchase_orders({"vendor_id": self.vendor.id}).get(self.vendor.id, stored))
+
+    def test_writes_apply_counter_deltas(self):
+        self.client.post("/api/purchase_orders/", self.purchase_order_payload(self.vendor), format="json")
+        po_id = PurchaseOrder.objects.get().id
+        self.assertCounters(open_po_count=1, total_quantity=3)
+
+        self.client.post("/api/purchase_orders/", self.purchase_order_payload(self.vendor, status="complete"),
+                         format="json")
+        self.assertCounters(open_po_count=1, completed_po_count=1, total_quantity=6)
+
+        self.client.put(f"/api/purchase_orders/{po_id}", {"items": [{"name": "item", "quantity": 5}]}, format="json")
+        self.assertCounters(open_po_count=1, completed_po_count=1, total_quantity=8)
+
+        self.client.post(f"/api/purchase_orders/{po_id}/acknowledge")
+        self.assertCounters(completed_po_count=2, total_quantity=8)
+
+        self.client.put(f"/api/purchase_orders/{po_id}", {"status": "canceled"}, format="json")
+        self.assertCounters(completed_po_count=1, canceled_po_count=1, total_quantity=8)
+
+        self.client.delete(f"/api/purchase_orders/{po_id}")
+        self.assertCounters(completed_po_count=1, total_quantity=3)
+
+    def test_stale_update_does_not_apply_deltas(self):
+        purchase_order = self.create_purchase_order(self.vendor, quantity=2)
+        update_po_counters(None, counter_state(purchase_order))
+        stale = PurchaseOrder.objects.get(id=purchase_order.id)
+        self.client.post(f"/api/purchase_orders/{purchase_order.id}/acknowledge")
+
+        serializer = PurchaseOrderSerializer(stale, data={"status": "canceled"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(VersionConflict):
+            serializer.save()
+        self.assertCounters(completed_po_count=1, total_quantity=2)
+
+    def test_archived_quantity_is_backfilled(self):
+        for quantity in (2, 5):
+            self.create_purchase_order(self.vendor, status="complete", quantity=quantity,
+                                       order_date=timezone.now() - timedelta(days=100))
+        archive_purchase_order_batch(timezone.now() - timedelta(days=30), 100)
+        VendorArchiveAggregate.objects.update(total_quantity=0)
+
+        backfill = import_module("fatmug_app.migrations.0011_backfill_archived_total_quantity")
+        backfill.backfill_archived_total_quantity(django_apps, None)
+
+        self.assertEqual(VendorArchiveAggregate.objects.get(vendor=self.vendor).total_quantity, 7)
+
+
+@override_settings(METRIC_WORKERS=2)
+class MetricWorkerTests(APITestMixin, APITestCase):
+    """
+    Check that purchase order writes queue metric updates by vendor shard and that workers apply them.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.vendors = [self.create_vendor(f"Vendor {i}") for i in range(4)]
+
+    @override_settings(METRIC_WORKERS=2)
+    def test_worker_arguments_must_be_positive(self):
+        for argument in ("--batch-size", "--poll-interval"):
+            with self.assertRaises(CommandError):
+                call_command("run_metric_workers", "--shard", "0", argument, "0")
+
+    def complete_purchase_order(self, vendor, days_late=0):
+        now = timezone.now()
+        purchase_order = self.create_purchase_order(vendor, status="complete", acknowledgment_date=now,
+                                                    delivery_date=now - timedelta(days=days_late))
+        update_performance_metrics(vendor)
+        return purchase_order
+
+    def drain(self, shard, workers=2):
+        # MetricWorker.run would close the test transaction's connection between batches.
+        worker = MetricWorker(shard, workers, batch_size=2, poll_interval=0)
+        while worker.process_batch():
+            pass
+
+    def test_updates_are_queued_and_claimed_by_shard(self):
+        for vendor in self.vendors:
+            self.complete_purchase_order(vendor)
+        self.assertEqual(sorted(PendingMetricUpdate.objects.values_list("vendor_id", "shard")),
+                         sorted((vendor.id, vendor.id % 2) for vendor in self.vendors))
+
+        self.drain(0)
+        self.assertEqual({update.shard for update in PendingMetricUpdate.objects.all()}, {1})
+        self.drain(1)
+        self.assertFalse(PendingMetricUpdate.objects.exists())
+        for vendor in Vendor.objects.all():
+            self.assertEqual(vendor.on_time_delivery_rate, 100, vendor.name)
+
+    def test_worker_starts_from_stored_metrics(self):
+        vendor = self.vendors[0]
+        self.complete_purchase_order(vendor)
+        self.drain(vendor.id % 2)
+        # Another writer changes the metrics after the worker's first batch.
+        Vendor.objects.filter(id=vendor.id).update(on_time_delivery_rate=0)
+
+        update_performance_metrics(vendor)
+        self.drain(vendor.id % 2)
+        vendor.refresh_from_db()
+        self.assertEqual(vendor.on_time_delivery_rate, 100)
+
+    def test_updates_of_another_worker_count_are_resharded(self):
+        vendor = self.vendors[0]
+        self.create_purchase_order(vendor, status="complete", acknowledgment_date=timezone.now())
+        PendingMetricUpdate.objects.create(vendor_id=vendor.id, shard=7)
+
+        self.drain(vendor.id % 2)
+        self.assertFalse(PendingMetricUpdate.objects.exists())
+        vendor.refresh_from_db()
+        self.assertEqual(vendor.fulfillment_rate, 100)
+
+
+class ProfilingTests(APITestMixin, APITestCase):
+    """
+    Check that only admin users can profile their requests and that the profile buffer is bounded.
+    """
+
+    def test_only_admin_requests_are_profiled(self):
+        response = self.client.get("/api/vendors/", HTTP_X_PROFILE="1")
+        self.assertIn("X-Profile-Id", response.headers)
+
+        user = User.objects.create_user("user", "user@example.com", "password")
+        for authorization, status_code in ((f"Bearer {RefreshToken.for_user(user).access_token}", 403),
+                                           ("Bearer invalid", 401), (None, 401)):
+            self.client.credentials(**({"HTTP_AUTHORIZATION": authorization} if authorization else {}))
+            with mock.patch.object(StackSampler, "start") as start:
+                response = self.client.get("/api/vendors/", HTTP_X_PROFILE="1")
+            self.assertEqual(response.status_code, status_code)
+            self.assertNotIn("X-Profile-Id", response.headers)
+            start.assert_not_called()
+
+    def test_buffer_keeps_the_latest_profiles(self):
+        for _ in range(settings.PROFILING_BUFFER_SIZE + 5):
+            response = self.client.get("/api/profiles/", HTTP_X_PROFILE="1")
+        profiles = get_profiles()
+        self.assertEqual(len(profiles), settings.PROFILING_BUFFER_SIZE)
+        self.assertEqual(profiles[0]["id"], int(response.headers["X-Profile-Id"]))
+
+    def test_frames_without_qualified_name_use_function_name(self):
+        frame = SimpleNamespace(f_code=SimpleNamespace(co_name="handler"), f_globals={"__name__": "module"},
+                                f_back=SimpleNamespace(f_code=SimpleNamespace(co_name="<module>"), f_globals={},
+                                                       f_back=None))
+        self.assertEqual(StackSampler._collapse(frame), "?:<module>;module:handler")
+
+
+class CompressionTests(APITestMixin, APITestCase):
+    """
+    Check the response encodings negotiated by CompressionMiddleware.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for i in range(20):
+            self.create_vendor(f"Vendor {i}")
+
+    @skipUnless(brotli, "Brotli is not installed")
+    def test_listing_is_compressed_with_brotli(self):
+        response = self.client.get("/api/vendors/", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response.headers["Content-Encoding"], "br")
+        self.assertEqual(json.loads(brotli.decompress(response.content)), self.client.get("/api/vendors/").json())
+
+    def test_token_responses_are_not_compressed_with_brotli(self):
+        self.client.credentials()
+        # A long username makes the response worth compressing.
+        User.objects.create_superuser("a" * 200, "admin2@example.com", "password")
+        credentials = {"username": "a" * 200, "password": "password"}
+        response = self.client.post("/api/admin-tokens/", credentials, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+
+        response = self.client.post("/api/admin-tokens/", credentials, HTTP_ACCEPT_ENCODING="br")
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertIn("token", response.json()["data"])
+
+
+settings_api = import_module("fatmug_designs.settings_api")
+
+
+@override_settings(ROOT_URLCONF=settings_api.ROOT_URLCONF, MIDDLEWARE=settings_api.MIDDLEWARE,
+                   REST_FRAMEWORK=settings_api.REST_FRAMEWORK)
+class APISettingsTests(APITestMixin, APITestCase):
+    """
+    Check that the API-only settings profile still authenticates, throttles and compresses API requests.
+    """
+
+    def test_token_read_and_write(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get("/api/vendors/").status_code, 401)
+        self.assertEqual(self.client.get("/admin/").status_code, 404)
+
+        response = self.client.post("/api/admin-tokens/", {"username": "admin", "password": "password"})
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['data']['token']['access']}")
+
+        for i in range(20):
+            self.create_vendor(f"Vendor {i}")
+        response = self.client.get("/api/vendors/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Content-Type"], "application/json")
+
+        response = self.client.post("/api/purchase_orders/", self.purchase_order_payload(self.create_vendor()),
+                                    format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_throttling(self):
+        self.client.credentials()
+        credentials = {"username": "admin", "password": "wrong"}
+        # The "admin_tokens" bucket holds 10 tokens.
+        responses = [self.client.post("/api/admin-tokens/", credentials).status_code for _ in range(11)]
+        self.assertEqual(responses[-1], 429)
+        self.assertNotIn(429, responses[:-1])
+
+
+class ResponseShapeTests(APITestMixin, APITestCase):
+    """
+    Check the normalized purchase order listing and the MessagePack encoding.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.vendors = [self.create_vendor(f"Vendor {i}") for i in range(2)]
+        for vendor in self.vendors:
+            for _ in range(3):
+                self.create_purchase_order(vendor)
+
+    def test_normalized_listing_lists_each_vendor_once(self):
+        nested = self.client.get("/api/purchase_orders/").json()
+        response = self.client.get("/api/purchase_orders/", {"shape": "normalized"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual([vendor["id"] for vendor in data["vendors"]], [vendor.id for vendor in self.vendors])
+        vendors = {vendor["id"]: vendor for vendor in data["vendors"]}
+        self.assertEqual(len(data["purchase_orders"]), len(nested))
+        for row, nested_row in zip(data["purchase_orders"], nested):
+            self.assertNotIn("vendor_details", row)
+            self.assertEqual(vendors[row["vendor"]], nested_row.pop("vendor_details"))
+            self.assertEqual(row, nested_row)
+
+    @skipUnless(msgpack, "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        for params in ({}, {"shape": "normalized"}):
+            expected = self.client.get("/api/purchase_orders/", params).json()
+            response = self.client.get("/api/purchase_orders/", params, HTTP_ACCEPT="application/msgpack")
+            self.assertEqual(response.headers["Content-Type"], "application/msgpack")
+            self.assertEqual(msgpack.unpackb(response.content), expected)
+            response = self.client.get("/api/purchase_orders/", {**params, "format": "msgpack"})
+            self.assertEqual(msgpack.unpackb(response.content), expected)
+
+
+class IdempotencyTests(APITestMixin, APITestCase):
+    """
+    Check the replay, rejection and release of Idempotency-Key requests.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.vendor = self.create_vendor()
+        self.payload = self.purchase_order_payload(self.vendor)
+
+    def post(self, key="key", payload=None, **headers):
+        return self.client.post("/api/purchase_orders/", payload or self.payload, format="json",
+                                HTTP_IDEMPOTENCY_KEY=key, **headers)
+
+    def test_sweep_batch_size_must_be_positive(self):
+        with self.assertRaises(CommandError):
+            call_command("sweep_idempotency_keys", "--batch-size", "0")
+
+    def test_retry_replays_stored_response(self):
+        first = self.post()
+        retry = self.post()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.data), (first.status_code, first.data))
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        self.post()
+        self.assertEqual(self.post(payload={**self.payload, "status": "canceled"}).status_code, 422)
+
+        url = f"/api/vendors/{self.vendor.id}"
+        self.client.put(url, {"name": "Renamed"}, format="json", HTTP_IDEMPOTENCY_KEY="put", HTTP_IF_MATCH='"1"')
+        response = self.client.put(url, {"name": "Renamed"}, format="json", HTTP_IDEMPOTENCY_KEY="put",
+                                   HTTP_IF_MATCH='"2"')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_concurrent_duplicate_is_rejected_until_lease_ends(self):
+        # A request holding the key, as seen by a duplicate sent while it is still running.
+        request = mock.Mock(method="POST", path="/api/purchase_orders/", data=self.payload, headers={})
+        reservation = IdempotencyKey.objects.create(key="key", user_id=self.admin.id,
+                                                    request_hash=_request_hash(request),
+                                                    expires_at=timezone.now() + timedelta(seconds=30))
+        self.assertEqual(self.post().status_code, 409)
+        self.assertEqual(PurchaseOrder.objects.count(), 0)
+
+        # The holder died without committing: once the lease ends, a retry takes the key over.
+        IdempotencyKey.objects.filter(id=reservation.id).update(expires_at=timezone.now())
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+    def test_server_error_rolls_back_the_write_and_releases_the_key(self):
+        with mock.patch("fatmug_app.serializers.update_performance_metrics", side_effect=RuntimeError("failed")):
+            self.assertEqual(self.post().status_code, 500)
+        self.assertEqual(PurchaseOrder.objects.count(), 0)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
+
+
+class ThrottlingTests(APITestMixin, TestCase):
+    """
+    Check that concurrent requests cannot overspend a token bucket or lose rejection counts.
+    """
+
+    def run_threads(self, target, threads=8):
+        workers = [threading.Thread(target=target) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    @mock.patch("fatmug_app.throttling.BUCKET_LOCK_WAIT", 5)
+    def test_concurrent_requests_spend_each_token_once(self):
+        request = mock.Mock(user=self.admin)
+        view = mock.Mock(throttle_scope="admin_tokens")
+        allowed = []
+        get = LocMemCache.get
+
+        def slow_get(cache, *args, **kwargs):
+            # Switch threads between reading and writing back a bucket, as concurrent workers would.
+            value = get(cache, *args, **kwargs)
+            time.sleep(0.001)
+            return value
+
+        def spend():
+            for _ in range(5):
+                if ScopedTokenBucketThrottle().allow_request(request, view):
+                    allowed.append(1)
+
+        with mock.patch.object(LocMemCache, "get", slow_get):
+            self.run_threads(spend)
+        # The "admin_tokens" bucket holds 10 tokens and refills one every 6 seconds.
+        self.assertEqual(len(allowed), 10)
+        self.assertEqual(get_rejection_counts(THROTTLE_COUNTER_PREFIX, ["admin_tokens"])["admin_tokens"], 30)
+
+    @mock.patch("fatmug_app.throttling.BUCKET_LOCK_WAIT", 0.01)
+    def test_lock_timeout_does_not_reject_a_client_with_tokens(self):
+        request = mock.Mock(user=self.admin)
+        view = mock.Mock(throttle_scope="admin_tokens")
+        throttle = ScopedTokenBucketThrottle()
+        # A concurrent request holding the bucket lock past the wait.
+        cache.add(f"throttle_bucket:admin_tokens:{self.admin.pk}:lock", 1)
+
+        self.assertTrue(throttle.allow_request(request, view))
+        self.assertEqual(get_rejection_counts(LOCK_TIMEOUT_COUNTER_PREFIX, ["admin_tokens"])["admin_tokens"], 1)
+        self.assertEqual(get_rejection_counts(THROTTLE_COUNTER_PREFIX, ["admin_tokens"])["admin_tokens"], 0)
+        self.assertEqual(throttle.tokens, 10)
+
+    def test_concurrent_rejections_are_all_counted(self):
+        def reject():
+            for _ in range(50):
+                record_rejection(THROTTLE_COUNTER_PREFIX, "test")
+
+        self.run_threads(reject)
+        self.assertEqual(get_rejection_counts(THROTTLE_COUNTER_PREFIX, ["test"])["test"], 400)
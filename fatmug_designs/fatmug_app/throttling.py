@@ -0,0 +1,238 @@
+import functools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_COUNTER_PREFIX = "admission_throttled"
+SHED_COUNTER_PREFIX = "admission_shed"
+LOCK_TIMEOUT_COUNTER_PREFIX = "admission_lock_timeout"
+
+# Seconds a request waits for the lock of a token bucket held by a concurrent request of the same client.
+BUCKET_LOCK_WAIT = 0.05
+
+
+def record_rejection(prefix, name):
+    """
+    Increment the shared counter of requests rejected by a throttle scope or concurrency pool.
+
+    The same counters record the bucket lock timeouts of a throttle scope under LOCK_TIMEOUT_COUNTER_PREFIX.
+
+    Args:
+        prefix (str): THROTTLE_COUNTER_PREFIX, SHED_COUNTER_PREFIX or LOCK_TIMEOUT_COUNTER_PREFIX.
+        name (str): The throttle scope or concurrency pool name.
+    """
+    key = f"{prefix}:{name}"
+    while True:
+        # Both add and incr are atomic, so concurrent increments are never lost.
+        if cache.add(key, 1, timeout=None):
+            return
+        try:
+            cache.incr(key)
+            return
+        except ValueError:
+            # The counter was evicted between add and incr, create it again.
+            continue
+
+
+def get_rejection_counts(prefix, names):
+    """
+    Read the rejection counters of several throttle scopes or concurrency pools.
+
+    Args:
+        prefix (str): THROTTLE_COUNTER_PREFIX, SHED_COUNTER_PREFIX or LOCK_TIMEOUT_COUNTER_PREFIX.
+        names (iterable): The scope or pool names.
+
+    Returns:
+        dict: The number of rejected requests keyed by name.
+    """
+    counts = cache.get_many([f"{prefix}:{name}" for name in names])
+    return {name: counts.get(f"{prefix}:{name}", 0) for name in names}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    TokenBucketThrottle limits requests with a token bucket stored in the Django cache.
+
+    A rate of "N/period" gives a bucket of N tokens refilled continuously at N per period, so clients can
+    burst up to N requests and are then limited to the average rate. Rates are read from
+    DEFAULT_THROTTLE_RATES like DRF's built-in throttles.
+
+    The bucket is read and written back while holding a lock taken with the atomic cache.add, so concurrent
+    requests cannot spend the same token. A request that cannot take the lock within BUCKET_LOCK_WAIT, for
+    example behind a slow cache, is decided on an unlocked read of the bucket rather than rejected, and counted
+    under LOCK_TIMEOUT_COUNTER_PREFIX; such requests may spend a token twice. The cache must be shared between
+    worker processes (e.g. Redis or Memcached): with the local memory cache, every process has its own buckets.
+
+    Attributes:
+        scope (str): The throttle scope, used to look up the rate and build the cache key.
+    """
+
+    scope = None
+    durations = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_cache_key(self, request, view):
+        """
+        Build the cache key of the bucket for the request, or None to skip throttling.
+        """
+        ident = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+        return f"throttle_bucket:{self.scope}:{ident}"
+
+    def parse_rate(self, rate):
+        """
+        Parse a "N/period" rate into a bucket capacity and a refill rate in tokens per second.
+        """
+        num, period = rate.split("/")
+        capacity = int(num)
+        return capacity, capacity / self.durations[period[0]]
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope) if self.scope else None
+        key = self.get_cache_key(request, view) if rate else None
+        if key is None:
+            return True
+
+        capacity, self.refill_rate = self.parse_rate(rate)
+        lock_key = f"{key}:lock"
+        locked = self._acquire(lock_key)
+        if not locked:
+            record_rejection(LOCK_TIMEOUT_COUNTER_PREFIX, self.scope)
+
+        try:
+            now = time.time()
+            tokens, updated = cache.get(key, (capacity, now))
+            self.tokens = min(capacity, tokens + (now - updated) * self.refill_rate)
+
+            if self.tokens < 1:
+                record_rejection(THROTTLE_COUNTER_PREFIX, self.scope)
+                return False
+
+            cache.set(key, (self.tokens - 1, now), timeout=int(capacity / self.refill_rate) + 1)
+            return True
+        finally:
+            if locked:
+                cache.delete(lock_key)
+
+    def _acquire(self, lock_key):
+        """
+        Take the lock of a bucket, waiting up to BUCKET_LOCK_WAIT for a concurrent request to release it.
+
+        The lock expires after a second, in case its holder died without releasing it.
+        """
+        deadline = time.monotonic() + BUCKET_LOCK_WAIT
+        while not cache.add(lock_key, 1, timeout=1):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) / self.refill_rate
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    UserTokenBucketThrottle applies the "user" rate per authenticated user and the "anon" rate per client IP.
+    """
+
+    def get_scope(self, request, view):
+        return "user" if request.user and request.user.is_authenticated else "anon"
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """
+    ScopedTokenBucketThrottle applies the rate of the view's throttle_scope per user, for per-endpoint quotas.
+    """
+
+    def get_scope(self, request, view):
+        return getattr(view, "throttle_scope", None)
+
+
+class ConcurrencyLimiter:
+    """
+    ConcurrencyLimiter bounds the number of requests of a pool running at once in a worker process.
+
+    Requests arriving while the pool is full are rejected immediately instead of queueing, so expensive
+    endpoints cannot take every worker thread and delay cheap ones.
+
+    Attributes:
+        name (str): The pool name, used in CONCURRENCY_LIMITS and in the rejection counters.
+        limit (int): The maximum number of concurrent requests.
+    """
+
+    _limiters = {}
+    _lock = threading.Lock()
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._counter_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name):
+        """
+        Get the process-wide limiter of a pool, creating it from CONCURRENCY_LIMITS on first use.
+        """
+        with cls._lock:
+            if name not in cls._limiters:
+                cls._limiters[name] = cls(name, settings.CONCURRENCY_LIMITS[name])
+            return cls._limiters[name]
+
+    def acquire(self):
+        if not self._semaphore.acquire(blocking=False):
+            return False
+        with self._counter_lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._counter_lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+
+def limit_concurrency(pool):
+    """
+    Shed load for a view method when its concurrency pool is full.
+
+    Rejected requests get a 503 response with a Retry-After header and are counted in the pool's
+    rejection counter.
+
+    Args:
+        pool (str): Name of the pool in CONCURRENCY_LIMITS.
+
+    Returns:
+        function: The decorator.
+    """
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            limiter = ConcurrencyLimiter.get(pool)
+            if not limiter.acquire():
+                record_rejection(SHED_COUNTER_PREFIX, pool)
+                logger.warning("Shed request to %s: concurrency pool %r is full", request.path, pool)
+                return Response({"error": "Server is busy, retry later"},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+            try:
+                return view_method(self, request, *args, **kwargs)
+            finally:
+                limiter.release()
+
+        return wrapper
+
+    return decorator
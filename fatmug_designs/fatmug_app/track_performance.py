@@ -1,7 +1,103 @@
-from .models import PurchaseOrder, HistoricalPerformance
-from django.db.models import Avg, ExpressionWrapper, F, fields
-from django.utils import timezone
+from .concurrency import next_version
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, VendorArchiveAggregate
+from .query_budget import query_budget
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, Max, Q, Sum, fields
 
+# Vendor fields maintained by the performance metric pipeline.
+METRIC_FIELDS = ("on_time_delivery_rate", "quality_rating_avg", "average_response_time", "fulfillment_rate")
+
+# Additive purchase order counters aggregated per vendor, carried forward when orders are archived.
+COUNTER_FIELDS = ("total_orders", "completed_orders", "on_time_orders", "quality_rating_sum", "quality_rating_count",
+                  "response_time_sum", "response_time_count", "total_quantity")
+
+
+def aggregate_purchase_orders(purchase_orders):
+    """
+    Aggregate the raw performance counters of purchase orders grouped by vendor in a single query.
+
+    Args:
+        purchase_orders (QuerySet): The purchase orders to aggregate.
+
+    Returns:
+        dict: A mapping of vendor ID to its aggregated counters.
+    """
+    response_time = ExpressionWrapper(F('acknowledgment_date') - F('order_date'), output_field=fields.DurationField())
+    acknowledged = Q(acknowledgment_date__isnull=False)
+    rows = purchase_orders.order_by().values("vendor_id").annotate(
+        total_orders=Count("id"),
+        completed_orders=Count("id", filter=Q(status="complete")),
+        on_time_orders=Count("id", filter=Q(status="complete", delivery_date__gte=F('acknowledgment_date'))),
+        quality_rating_sum=Sum("quality_rating"),
+        quality_rating_count=Count("quality_rating"),
+        response_time_sum=Sum(response_time, filter=acknowledged),
+        response_time_count=Count("id", filter=acknowledged),
+        total_quantity=Sum("quantity"),
+    )
+
+    counters = {}
+    for row in rows:
+        vendor_id = row.pop("vendor_id")
+        row["quality_rating_sum"] = row["quality_rating_sum"] or 0
+        row["response_time_sum"] = row["response_time_sum"].total_seconds() if row["response_time_sum"] else 0
+        counters[vendor_id] = row
+    return counters
+
+
+def add_archived_counters(counters, archive_aggregates):
+    """
+    Add the counters carried forward from archived purchase orders to live counters, in place.
+
+    Args:
+        counters (dict): Live counters keyed by vendor ID, as returned by aggregate_purchase_orders.
+        archive_aggregates (QuerySet): The VendorArchiveAggregate rows of the same vendors.
+
+    Returns:
+        dict: The combined counters keyed by vendor ID.
+    """
+    for archived in archive_aggregates:
+        vendor_counters = counters.setdefault(archived.vendor_id, dict.fromkeys(COUNTER_FIELDS, 0))
+        for field in COUNTER_FIELDS:
+            vendor_counters[field] += getattr(archived, field)
+    return counters
+
+
+def compute_performance_metrics(counters, current):
+    """
+    Compute the performance metrics of a vendor from its aggregated purchase order counters.
+
+    Metrics that cannot be derived from the counters keep their current value.
+
+    Args:
+        counters (dict): Aggregated counters as returned by aggregate_purchase_orders.
+        current (dict): The current metric values of the vendor.
+
+    Returns:
+        dict: The updated metric values keyed by field name.
+    """
+    metrics = dict(current)
+
+    # Calculate on-time delivery rate.
+    if counters["completed_orders"]:
+        metrics["on_time_delivery_rate"] = (counters["on_time_orders"] / counters["completed_orders"]) * 100
+
+    # Calculate average quality rating.
+    if counters["quality_rating_count"]:
+        metrics["quality_rating_avg"] = round(counters["quality_rating_sum"] / counters["quality_rating_count"], 2)
+
+    # Calculate average response time.
+    if counters["response_time_sum"]:
+        average_response_time = counters["response_time_sum"] / counters["response_time_count"]
+        metrics["average_response_time"] = round(average_response_time // (24 * 3600), 2)
+
+    # Calculate fulfillment rate.
+    completed_order_percentage = (counters["completed_orders"] / counters["total_orders"]) * 100
+    metrics["fulfillment_rate"] = round(completed_order_percentage, 2)
+    return metrics
+
+
+@query_budget(max_queries=4, max_db_time=0.1)
 def create_performance_metrics(vendor):
     """
     Create and update performance metrics for a given vendor based on their purchase orders.
@@ -9,43 +105,102 @@ def create_performance_metrics(vendor):
     Args:
         vendor (Vendor): The vendor for which performance metrics are to be calculated.
     """
-    # Filter purchase orders for the specified vendor.
-    purchase_orders = PurchaseOrder.objects.filter(vendor_id=vendor.id)
-    
-    # Filter completed orders.
-    completed_orders = purchase_orders.filter(status="complete")
-
-    if purchase_orders.exists():
-        if completed_orders.exists():
-            # Calculate on-time delivery rate.
-            on_time_delivery_purchase_orders = completed_orders.filter(delivery_date__gte=F('acknowledgment_date'))
-            on_time_delivery_rate = (on_time_delivery_purchase_orders.count() / completed_orders.count()) * 100
-            vendor.on_time_delivery_rate = on_time_delivery_rate
-
-        # Calculate average quality rating.
-        average_quality_rating = purchase_orders.aggregate(average_quality_rating=Avg("quality_rating"))
-        average_quality_rating = round(average_quality_rating["average_quality_rating"], 2)
-        vendor.quality_rating_avg = average_quality_rating
-
-        # Calculate average response time.
-        average_response_time = purchase_orders.filter(acknowledgment_date__isnull=False).aggregate(average_response_time=Avg(
-            ExpressionWrapper(F('acknowledgment_date') - F('order_date'), output_field=fields.DurationField())
-        ))
-
-        if average_response_time["average_response_time"]:
-            average_response_time = round(average_response_time["average_response_time"].total_seconds() // (24 * 3600), 2)
-            vendor.average_response_time = average_response_time
-
-        # Calculate fulfillment rate.
-        completed_order_percentage = (completed_orders.count() / purchase_orders.count()) * 100
-        fulfillment_rate = round(completed_order_percentage, 2)
-        vendor.fulfillment_rate = fulfillment_rate
-
-        # Save updated performance metrics to the vendor.
-        vendor.save()
-
-        # Create historical performance record.
-        HistoricalPerformance.objects.create(vendor=vendor, on_time_delivery_rate=on_time_delivery_rate,
-                                             quality_rating_avg=average_quality_rating,
-                                             average_response_time=average_response_time,
-                                             fulfillment_rate=fulfillment_rate)
+    # Aggregate live and archived purchase orders for the specified vendor.
+    counters = aggregate_purchase_orders(PurchaseOrder.objects.filter(vendor_id=vendor.id))
+    add_archived_counters(counters, VendorArchiveAggregate.objects.filter(vendor_id=vendor.id))
+    counters = counters.get(vendor.id)
+
+    if counters:
+        current = {field: getattr(vendor, field) for field in METRIC_FIELDS}
+        metrics = compute_performance_metrics(counters, current)
+
+        # Save updated performance metrics to the vendor, changing its version (ETag) if they changed.
+        if metrics != current:
+            Vendor.all_objects.filter(id=vendor.id).update(**metrics, version=next_version())
+        for field, value in metrics.items():
+            setattr(vendor, field, value)
+
+        # Create historical performance record, unless snapshots are left to the scheduler.
+        if settings.PERFORMANCE_SNAPSHOTS_ON_WRITE:
+            HistoricalPerformance.objects.create(vendor=vendor, **metrics)
+
+
+def refresh_performance_metrics(vendor_ids):
+    """
+    Recompute the performance metrics of several vendors with one grouped aggregate query.
+
+    Args:
+        vendor_ids (list): IDs of the vendors to recompute.
+
+    Returns:
+        int: The number of vendors whose metrics changed.
+    """
+    counters = aggregate_purchase_orders(PurchaseOrder.objects.filter(vendor_id__in=vendor_ids))
+    add_archived_counters(counters, VendorArchiveAggregate.objects.filter(vendor_id__in=vendor_ids))
+    return apply_performance_counters(vendor_ids, counters)
+
+
+def apply_performance_counters(vendor_ids, counters, history=None):
+    """
+    Compute the performance metrics of several vendors from their aggregated counters and save the changed ones.
+
+    The current metrics of the vendors are read in the same call, and only vendors whose metrics differ from
+    them are saved, with a single bulk update that also increments their version.
+
+    Args:
+        vendor_ids (list): IDs of the vendors to update.
+        counters (dict): Aggregated counters keyed by vendor ID, as returned by add_archived_counters.
+        history (bool): Whether to create HistoricalPerformance snapshots of the changed vendors, or None to
+            follow PERFORMANCE_SNAPSHOTS_ON_WRITE.
+
+    Returns:
+        int: The number of vendors whose metrics changed.
+    """
+    if history is None:
+        history = settings.PERFORMANCE_SNAPSHOTS_ON_WRITE
+    current = {vendor_id: tuple(metrics) for vendor_id, *metrics in
+               Vendor.all_objects.filter(id__in=vendor_ids).values_list("id", *METRIC_FIELDS)}
+
+    changed = []
+    for vendor_id in vendor_ids:
+        # Skip vendors without purchase orders and vendors purged in the meantime.
+        if vendor_id not in counters or vendor_id not in current:
+            continue
+        metrics = compute_performance_metrics(counters[vendor_id], dict(zip(METRIC_FIELDS, current[vendor_id])))
+        if tuple(metrics[field] for field in METRIC_FIELDS) != current[vendor_id]:
+            changed.append((vendor_id, metrics))
+
+    with transaction.atomic():
+        Vendor.all_objects.bulk_update(
+            [Vendor(id=vendor_id, **metrics, version=next_version()) for vendor_id, metrics in changed],
+            [*METRIC_FIELDS, "version"])
+        if history:
+            HistoricalPerformance.objects.bulk_create(
+                [HistoricalPerformance(vendor_id=vendor_id, **metrics) for vendor_id, metrics in changed])
+    return len(changed)
+
+
+def take_performance_snapshots():
+    """
+    Record one HistoricalPerformance snapshot for every vendor whose metrics changed since its last snapshot.
+
+    The current metrics of all vendors and their latest snapshots are read with one query each, and the
+    new snapshots are written with a single bulk insert.
+
+    Returns:
+        tuple: The number of snapshots created and the number of unchanged vendors skipped.
+    """
+    current = {vendor_id: metrics for vendor_id, *metrics in Vendor.objects.values_list("id", *METRIC_FIELDS)}
+
+    latest_ids = HistoricalPerformance.objects.order_by().values("vendor_id").annotate(latest_id=Max("id"))
+    latest = {
+        vendor_id: metrics for vendor_id, *metrics in HistoricalPerformance.objects.filter(
+            id__in=latest_ids.values("latest_id")).values_list("vendor_id", *METRIC_FIELDS)
+    }
+
+    snapshots = [
+        HistoricalPerformance(vendor_id=vendor_id, **dict(zip(METRIC_FIELDS, metrics)))
+        for vendor_id, metrics in current.items() if latest.get(vendor_id) != metrics
+    ]
+    HistoricalPerformance.objects.bulk_create(snapshots)
+    return len(snapshots), len(current) - len(snapshots)
@@ -0,0 +1,138 @@
+from django.db.models import Count, Max
+
+from .models import HistoricalPerformance
+
+# Rows fetched from the database cursor at a time while scanning the history of a vendor.
+SCAN_CHUNK_SIZE = 2000
+
+
+def _scan(history, metric):
+    """
+    Stream the (timestamp, value, date) rows of a metric in chronological order, in chunks.
+
+    Args:
+        history (QuerySet): The HistoricalPerformance rows to scan.
+        metric (str): The metric field.
+
+    Yields:
+        tuple: The POSIX timestamp, the metric value and the date of each row.
+    """
+    rows = history.order_by("date", "id").values_list("date", metric).iterator(chunk_size=SCAN_CHUNK_SIZE)
+    for date, value in rows:
+        yield date.timestamp(), value, date
+
+
+def _lttb(history, metric, total, points):
+    """
+    Downsample with Largest-Triangle-Three-Buckets in two streaming passes.
+
+    The first pass computes the average point of every bucket; the second keeps, in each bucket, the point
+    forming the largest triangle with the point kept in the previous bucket and the average of the next one.
+    Memory is proportional to the number of buckets, not to the number of rows.
+    """
+    buckets = points - 2
+
+    def bucket_of(index):
+        # Bucket b holds the rows 1 + floor(b * (total - 2) / buckets) up to the start of bucket b + 1.
+        return min(-(-index * buckets // (total - 2)) - 1, buckets - 1)
+
+    sums = [[0.0, 0.0, 0] for _ in range(buckets)]
+    first = last = None
+    for index, (x, y, date) in enumerate(_scan(history, metric)):
+        if index == 0:
+            first = (x, y, date)
+        elif index < total - 1:
+            bucket = sums[bucket_of(index)]
+            bucket[0] += x
+            bucket[1] += y
+            bucket[2] += 1
+        last = (x, y, date)
+
+    averages = [(x_sum / count, y_sum / count) if count else None for x_sum, y_sum, count in sums]
+    selected = [first]
+    current, best, best_area = None, None, -1.0
+    for index, (x, y, date) in enumerate(_scan(history, metric)):
+        if index == 0 or index >= total - 1:
+            continue
+        bucket = bucket_of(index)
+        if bucket != current:
+            if best is not None:
+                selected.append(best)
+            current, best, best_area = bucket, None, -1.0
+            # Triangle corners: the point kept in the previous bucket and the average of the next bucket.
+            ax, ay = selected[-1][:2]
+            next_average = averages[bucket + 1] if bucket + 1 < buckets else None
+            cx, cy = next_average or last[:2]
+
+        area = abs((ax - cx) * (y - ay) - (ax - x) * (cy - ay))
+        if area > best_area:
+            best, best_area = (x, y, date), area
+
+    if best is not None:
+        selected.append(best)
+    selected.append(last)
+    return selected
+
+
+def _min_max(history, metric, total, points):
+    """
+    Downsample by keeping the minimum and the maximum of every bucket, in one streaming pass.
+
+    Spikes survive the downsampling, which averaging would smooth out.
+    """
+    buckets = max(points // 2, 1)
+    selected = []
+    current, low, high = 0, None, None
+    for index, row in enumerate(_scan(history, metric)):
+        bucket = min(index * buckets // total, buckets - 1)
+        if bucket != current:
+            selected.extend(sorted({low, high}))
+            current, low, high = bucket, None, None
+        if low is None or row[1] < low[1]:
+            low = row
+        if high is None or row[1] > high[1]:
+            high = row
+
+    if low is not None:
+        selected.extend(sorted({low, high}))
+    return selected
+
+
+DOWNSAMPLING_METHODS = {
+    "lttb": _lttb,
+    "minmax": _min_max,
+}
+
+
+def get_performance_trend(vendor_id, metric, start=None, end=None, points=300, method="lttb"):
+    """
+    Read the history of a performance metric of a vendor, downsampled to at most a number of points.
+
+    The rows are streamed through the (vendor, date) index, so memory and response size stay bounded by the
+    number of points however many snapshots the date range holds.
+
+    Args:
+        vendor_id (int): The ID of the vendor.
+        metric (str): The metric field of HistoricalPerformance.
+        start (datetime): Only snapshots taken at or after this date are included, or None.
+        end (datetime): Only snapshots taken before this date are included, or None.
+        points (int): The maximum number of points returned, at least 3.
+        method (str): The downsampling method, "lttb" or "minmax".
+
+    Returns:
+        tuple: The number of snapshots in the range and the (timestamp, value, date) points in chronological order.
+    """
+    history = HistoricalPerformance.objects.filter(vendor_id=vendor_id)
+    if start is not None:
+        history = history.filter(date__gte=start)
+    if end is not None:
+        history = history.filter(date__lt=end)
+
+    # Pin the rows to the snapshots existing now, so every pass sees the same rows.
+    summary = history.aggregate(total=Count("id"), last_id=Max("id"))
+    total = summary["total"]
+    history = history.filter(id__lte=summary["last_id"] or 0)
+
+    if total <= points:
+        return total, list(_scan(history, metric))
+    return total, DOWNSAMPLING_METHODS[method](history, metric, total, points)
@@ -3,25 +3,44 @@
 from django.urls import path, re_path
 from .views import (
     AdminTokensView,
+    AdminRefreshTokenView,
     VendorAPIView,
     PerformanceMetricsView,
+    PerformanceTrendView,
+    VendorForecastView,
     PurchaseOrderView,
     AcknowledgePOView,
+    ChangeFeedView,
+    AdmissionStatsView,
+    ProfileListView,
+    ProfileView,
 )
-from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
     # Endpoint for obtaining admin tokens.
     path('admin-tokens/', AdminTokensView.as_view(), name='admin-tokens'),
 
     # Endpoint for refreshing admin tokens.
-    path('admin_refresh_token/', TokenRefreshView.as_view(), name="admin-refresh-token"),
+    path('admin_refresh_token/', AdminRefreshTokenView.as_view(), name="admin-refresh-token"),
 
     # Endpoints for managing vendors.
     re_path('vendors/(?P<vendor_id>[^/]*)/?$', VendorAPIView.as_view(), name="vendor"),
     path("vendors/<int:vendor_id>/performance", PerformanceMetricsView.as_view(), name="vendor-performance"),
+    path("vendors/<int:vendor_id>/performance/trend", PerformanceTrendView.as_view(), name="vendor-performance-trend"),
+    path("vendors/<int:vendor_id>/forecast", VendorForecastView.as_view(), name="vendor-forecast"),
 
     # Endpoints for managing purchase orders.
     re_path('^purchase_orders/(?P<po_id>[^/]*)/?$', PurchaseOrderView.as_view(), name="purchase-order"),
     path("purchase_orders/<int:po_id>/acknowledge", AcknowledgePOView.as_view(), name="update-acknowledgement"),
+
+    # Endpoint for reading the change log of vendors and purchase orders.
+    path("changes/", ChangeFeedView.as_view(), name="changes"),
+
+    # Endpoint for monitoring throttling and load shedding.
+    path("admission-stats/", AdmissionStatsView.as_view(), name="admission-stats"),
+
+    # Endpoints for downloading request profiles.
+    path("profiles/", ProfileListView.as_view(), name="profiles"),
+    path("profiles/<int:profile_id>", ProfileView.as_view(), name="profile"),
+    path("profiles/<int:profile_id>/collapsed", ProfileView.as_view(), {"collapsed": True}, name="profile-collapsed"),
 ]
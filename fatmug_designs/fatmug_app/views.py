@@ -1,11 +1,54 @@
+from datetime import datetime
+
 from rest_framework import generics
 from rest_framework import status
-from .serializers import *
+from .serializers import (
+    ChangeEventSerializer,
+    CustomTokenObtainPairSerializer,
+    PerformanceMetricsSerializer,
+    PurchaseOrderSerializer,
+    PurchaseOrderValuesSerializer,
+    VendorForecastSerializer,
+    VendorRetrieveSerializer,
+    VendorSerializer,
+    VendorListValuesSerializer,
+    NormalizedPurchaseOrderValuesSerializer,
+)
 from rest_framework.permissions import IsAdminUser, AllowAny
 from rest_framework.response import Response
-from .models import *
+from rest_framework_simplejwt.views import TokenRefreshView
+from .models import Vendor, PurchaseOrder, VendorForecast
+from .change_feed import POLL_INTERVAL, record_change, read_changes
+from .concurrency import (
+    VersionConflict,
+    check_expected_version,
+    get_etag,
+    get_expected_version,
+    update_changed_fields,
+)
+from .db_router import read_from_replica
+from .idempotency import idempotent
+from .throttling import (
+    LOCK_TIMEOUT_COUNTER_PREFIX,
+    SHED_COUNTER_PREFIX,
+    THROTTLE_COUNTER_PREFIX,
+    ConcurrencyLimiter,
+    get_rejection_counts,
+    limit_concurrency,
+)
+from .query_budget import query_budget
+from .track_performance import METRIC_FIELDS
+from .trends import DOWNSAMPLING_METHODS, get_performance_trend
+from .po_counters import counter_state, locked_counter_state, update_po_counters
+from .metric_workers import update_performance_metrics
+from django.conf import settings
+from rest_framework.settings import api_settings
 from django.contrib.auth import authenticate
-
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.fields import DateTimeField
 
 class AdminTokensView(generics.GenericAPIView):
     """
@@ -14,11 +57,16 @@ class AdminTokensView(generics.GenericAPIView):
     Attributes:
         serializer_class (Serializer): The serializer class for handling token authentication.
         permission_classes (list): The list of permission classes, allowing any user to access this view.
+        throttle_scope (str): The throttle scope holding the per-endpoint request quota.
+        returns_credentials (bool): Responses hold tokens, so they are not compressed with Brotli (BREACH).
     """
 
     serializer_class = CustomTokenObtainPairSerializer
     permission_classes = [AllowAny]
+    throttle_scope = "admin_tokens"
+    returns_credentials = True
 
+    @query_budget(max_queries=4, max_db_time=0.1)
     def post(self, request, format=None):
         """
         Handle POST requests to authenticate an admin user and generate an authentication token.
@@ -59,6 +107,32 @@ class AdminTokensView(generics.GenericAPIView):
             # Handle any exceptions that may occur during the authentication process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+class AdminRefreshTokenView(TokenRefreshView):
+    """
+    AdminRefreshTokenView is a class-based view for exchanging a refresh token for a new access token.
+
+    Attributes:
+        returns_credentials (bool): Responses hold tokens, so they are not compressed with Brotli (BREACH).
+    """
+
+    returns_credentials = True
+
+    @query_budget(max_queries=0)
+    def post(self, request, *args, **kwargs):
+        """
+        Handle POST requests to refresh an access token. Refresh tokens are verified without database access.
+
+        Args:
+            request (Request): The incoming POST request.
+            *args: Variable-length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Response: A JSON response containing the new access token or an error message.
+        """
+        return super().post(request, *args, **kwargs)
+
     
 class VendorAPIView(generics.GenericAPIView):
     """
@@ -67,25 +141,24 @@ class VendorAPIView(generics.GenericAPIView):
     Attributes:
         serializer_class (Serializer): The serializer class for handling vendor data.
         permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+        throttle_scope (str): The throttle scope holding the per-endpoint request quota.
     """
 
     serializer_class = VendorSerializer
     permission_classes = [IsAdminUser]
+    throttle_scope = "vendors"
 
     def get_serializer_class(self):
         """
         Get the serializer class for retrieving Vendor data with additional metadata.
 
         Returns:
-            Serializer: A custom serializer class for retrieving Vendor data with additional metadata.
+            Serializer: A serializer class for retrieving Vendor data with additional metadata.
         """
-        class VendorRetrieveSerializer(self.serializer_class):
-            class Meta:
-                model = self.serializer_class.Meta.model
-                fields = "__all__"
-                ref_name = "VendorRetrieveSerializer"
         return VendorRetrieveSerializer
 
+    @query_budget(max_queries=12, max_db_time=0.25)
+    @idempotent
     def post(self, request, *args, **kwargs):
         """
         Handle POST requests to create a new Vendor instance.
@@ -111,6 +184,8 @@ class VendorAPIView(generics.GenericAPIView):
             # Handle any exceptions that may occur during the creation process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @query_budget(max_queries=2, max_db_time=0.5)
+    @read_from_replica
     def get(self, request, vendor_id=None):
         """
         Handle GET requests to retrieve vendor data.
@@ -129,21 +204,44 @@ class VendorAPIView(generics.GenericAPIView):
                 serializer_class = self.get_serializer_class()
                 serializer = serializer_class(vendor)
             else:
-                # Retrieve all Vendor instances and serialize them using the default serializer.
-                vendors = Vendor.objects.all()
-                serializer = self.serializer_class(vendors, many=True)
+                # Retrieve all Vendor instances through the load-shedding listing path.
+                return self.list_vendors(request)
 
-            # Return a JSON response with the serialized data and a success status code.
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # Return a JSON response with the serialized data, its version as ETag and a success status code.
+            return Response(serializer.data, status=status.HTTP_200_OK, headers={"ETag": get_etag(vendor)})
+
+        except Vendor.DoesNotExist:
+            # The vendor does not exist or is deleted and pending purge.
+            return Response({"error": "Vendor not found"}, status=status.HTTP_404_NOT_FOUND)
 
         except Exception as e:
             # Handle any exceptions that may occur during the retrieval process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @limit_concurrency("listings")
+    def list_vendors(self, request):
+        """
+        List all vendors with their purchase order counters using the fast read path.
+
+        Args:
+            request (Request): The incoming GET request.
+
+        Returns:
+            Response: A JSON response containing the serialized vendors.
+        """
+        vendors = Vendor.objects.order_by("id")
+        serializer = VendorListValuesSerializer(vendors)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @query_budget(max_queries=12, max_db_time=0.25)
+    @idempotent
     def put(self, request, vendor_id=None):
         """
         Handle PUT requests to update an existing Vendor instance.
 
+        The update is rejected with 409 if the vendor no longer has the version sent in the If-Match header
+        or the "expected_version" field, or if it is modified concurrently.
+
         Args:
             request (Request): The incoming PUT request.
             vendor_id (int): The ID of the specific vendor to update.
@@ -151,28 +249,48 @@ class VendorAPIView(generics.GenericAPIView):
         Returns:
             Response: A JSON response indicating the success or failure of the vendor update.
         """
+        try:
+            expected_version = get_expected_version(request)
+        except ValueError:
+            return Response({"error": "If-Match and expected_version must be a version number"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
         try:
             if vendor_id:
                 # Retrieve a specific Vendor instance by ID, update it with the provided data, and save it.
                 vendor = Vendor.objects.get(id=vendor_id)
-                serializer = self.serializer_class(data=request.data, instance=vendor, partial=True)
+                serializer = self.serializer_class(data=request.data, instance=vendor, partial=True,
+                                                   context={"expected_version": expected_version})
                 
                 if serializer.is_valid(raise_exception=True):
                     serializer.save()
-                    return Response({"message": "Your details are updated successfully"}, status=status.HTTP_200_OK)
+                    return Response({"message": "Your details are updated successfully"}, status=status.HTTP_200_OK,
+                                    headers={"ETag": get_etag(vendor)})
 
             else:
                 # If no vendor_id is provided, return an error response.
                 return Response({"error": "Enter a valid vendor_id"}, status=status.HTTP_400_BAD_REQUEST)
 
+        except Vendor.DoesNotExist:
+            # The vendor does not exist or is deleted and pending purge.
+            return Response({"error": "Vendor not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        except VersionConflict as e:
+            # Another request updated the vendor since the client (412) or this request (409) read it.
+            return Response({"error": str(e)}, status=e.status_code)
+
         except Exception as e:
             # Handle any exceptions that may occur during the update process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @query_budget(max_queries=6, max_db_time=0.25)
     def delete(self, request, vendor_id=None):
         """
         Handle DELETE requests to delete a specified Vendor instance.
 
+        The deletion increments the version of the vendor, and is rejected with 409 if the vendor no longer has
+        the version sent in the If-Match header or the "expected_version" field.
+
         Args:
             request (Request): The incoming DELETE request.
             vendor_id (int): The ID of the specific vendor to delete.
@@ -180,11 +298,22 @@ class VendorAPIView(generics.GenericAPIView):
         Returns:
             Response: A JSON response indicating the success or failure of the vendor deletion.
         """
+        try:
+            expected_version = get_expected_version(request)
+        except ValueError:
+            return Response({"error": "If-Match and expected_version must be a version number"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
         try:
             if vendor_id:
-                # Retrieve a specific Vendor instance by ID and delete it.
+                # Retrieve a specific Vendor instance by ID and mark it as deleted.
+                # Its purchase orders and history are removed in batches by the purge_deleted_vendors command.
                 vendor = Vendor.objects.get(id=vendor_id)
-                vendor.delete()
+                check_expected_version(vendor, expected_version)
+                vendor.deleted_at = timezone.now()
+                with transaction.atomic():
+                    update_changed_fields(vendor, ["deleted_at"])
+                    record_change(vendor, "deleted")
                 
                 # Return a success response indicating the successful deletion.
                 return Response({"message": "Vendor deleted successfully"}, status=status.HTTP_200_OK)
@@ -193,6 +322,14 @@ class VendorAPIView(generics.GenericAPIView):
                 # If no vendor_id is provided, return an error response.
                 return Response({"error": "Enter a valid vendor ID"}, status=status.HTTP_400_BAD_REQUEST)
 
+        except Vendor.DoesNotExist:
+            # The vendor does not exist or is already deleted.
+            return Response({"error": "Vendor not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        except VersionConflict as e:
+            # Another request updated the vendor since the client (412) or this request (409) read it.
+            return Response({"error": str(e)}, status=e.status_code)
+
         except Exception as e:
             # Handle any exceptions that may occur during the deletion process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -205,11 +342,15 @@ class PurchaseOrderView(generics.GenericAPIView):
     Attributes:
         serializer_class (Serializer): The serializer class for handling purchase order data.
         permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+        throttle_scope (str): The throttle scope holding the per-endpoint request quota.
     """
 
     serializer_class = PurchaseOrderSerializer
     permission_classes = [IsAdminUser]
+    throttle_scope = "purchase_orders"
 
+    @query_budget(max_queries=18, max_db_time=0.5)
+    @idempotent
     def post(self, request, *args, **kwargs):
         """
         Handle POST requests to create a new Purchase Order instance.
@@ -235,6 +376,8 @@ class PurchaseOrderView(generics.GenericAPIView):
             # Handle any exceptions that may occur during the creation process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @query_budget(max_queries=3, max_db_time=1.0)
+    @read_from_replica
     def get(self, request, *args, **kwargs):
         """
         Get the queryset of Purchase Orders based on query parameters.
@@ -247,28 +390,58 @@ class PurchaseOrderView(generics.GenericAPIView):
         purchase_order_id = kwargs.get("po_id", None)
         
         try:
-            if vendor_id:
-                purchase_orders = PurchaseOrder.objects.filter(vendor_id=vendor_id)
-                serializer = self.serializer_class(purchase_orders, many=True)
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            
             if purchase_order_id:
-                purchase_orders = PurchaseOrder.objects.get(id=purchase_order_id)
+                # Hide purchase orders of vendors that are deleted and pending purge.
+                purchase_orders = PurchaseOrder.objects.get(id=purchase_order_id, vendor__deleted_at__isnull=True)
                 serializer = self.serializer_class(purchase_orders)
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            
-            # If no parameters are provided, return all Purchase Orders.
-            purchase_orders = PurchaseOrder.objects.all()
-            serializer = self.serializer_class(purchase_orders, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+                return Response(serializer.data, status=status.HTTP_200_OK, headers={"ETag": get_etag(purchase_orders)})
+
+            # Otherwise list the Purchase Orders, optionally filtered by vendor, through the load-shedding path.
+            return self.list_purchase_orders(request, vendor_id)
+
+        except PurchaseOrder.DoesNotExist:
+            # The purchase order does not exist or its vendor is deleted and pending purge.
+            return Response({"error": "Purchase Order not found"}, status=status.HTTP_404_NOT_FOUND)
 
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @limit_concurrency("listings")
+    def list_purchase_orders(self, request, vendor_id=None):
+        """
+        List the Purchase Orders using the fast read path.
+
+        With the query parameter shape=normalized, each vendor is returned once in a "vendors" side table
+        instead of being embedded in every purchase order.
+
+        Args:
+            request (Request): The incoming GET request.
+            vendor_id (str): The ID of the vendor whose purchase orders are listed, or None for all of them.
+
+        Returns:
+            Response: A response containing the serialized purchase orders.
+        """
+        # Hide purchase orders of vendors that are deleted and pending purge.
+        purchase_orders = PurchaseOrder.objects.filter(vendor__deleted_at__isnull=True)
+        if vendor_id:
+            purchase_orders = purchase_orders.filter(vendor_id=vendor_id)
+
+        if request.GET.get("shape") == "normalized":
+            serializer_class = NormalizedPurchaseOrderValuesSerializer
+        else:
+            serializer_class = PurchaseOrderValuesSerializer
+        serializer = serializer_class(purchase_orders.order_by("id"))
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @query_budget(max_queries=18, max_db_time=0.5)
+    @idempotent
     def put(self, request, *args, **kwargs):
         """
         Handle PUT requests to update an existing Purchase Order instance.
 
+        The update is rejected with 409 if the purchase order no longer has the version sent in the If-Match
+        header or the "expected_version" field, or if it is modified concurrently.
+
         Args:
             request (Request): The incoming PUT request.
             *args: Variable-length argument list.
@@ -277,23 +450,40 @@ class PurchaseOrderView(generics.GenericAPIView):
         Returns:
             Response: A JSON response indicating the success or failure of the purchase order update.
         """
+        try:
+            expected_version = get_expected_version(request)
+        except ValueError:
+            return Response({"error": "If-Match and expected_version must be a version number"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
         try:
             # Retrieve Purchase Order ID from URL parameters.
             po_id = kwargs.get("po_id")
-            purchase_order = PurchaseOrder.objects.get(id=po_id)
+            purchase_order = PurchaseOrder.objects.get(id=po_id, vendor__deleted_at__isnull=True)
             
             # Update the existing Purchase Order instance with the provided data.
-            serializer = self.serializer_class(data=request.data, instance=purchase_order, partial=True)
+            serializer = self.serializer_class(data=request.data, instance=purchase_order, partial=True,
+                                               context={"expected_version": expected_version})
             
             if serializer.is_valid(raise_exception=True):
                 # If validation is successful, save the updated Purchase Order and return a success response.
                 serializer.save()
-                return Response({"message": "Purchase Order Updated Successfully"}, status=status.HTTP_200_OK)
-        
+                return Response({"message": "Purchase Order Updated Successfully"}, status=status.HTTP_200_OK,
+                                headers={"ETag": get_etag(purchase_order)})
+
+        except PurchaseOrder.DoesNotExist:
+            # The purchase order does not exist or its vendor is deleted and pending purge.
+            return Response({"error": "Purchase Order not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        except VersionConflict as e:
+            # Another request updated the purchase order since the client (412) or this request (409) read it.
+            return Response({"error": str(e)}, status=e.status_code)
+
         except Exception as e:
             # Handle any exceptions that may occur during the update process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @query_budget(max_queries=6, max_db_time=0.25)
     def delete(self, request, po_id=None):
         """
         Handle DELETE requests to delete a specified Purchase Order instance.
@@ -306,13 +496,22 @@ class PurchaseOrderView(generics.GenericAPIView):
             Response: A JSON response indicating the success or failure of the purchase order deletion.
         """
         try:
-            # Retrieve and delete the specified Purchase Order instance by ID.
-            purchase_order = PurchaseOrder.objects.get(id=po_id)
-            purchase_order.delete()
+            # Retrieve and delete the specified Purchase Order instance by ID, locking it so that the counters
+            # are decremented by its stored state.
+            with transaction.atomic():
+                purchase_order = PurchaseOrder.objects.select_for_update(of=("self",)).get(
+                    id=po_id, vendor__deleted_at__isnull=True)
+                update_po_counters(counter_state(purchase_order), None)
+                record_change(purchase_order, "deleted")
+                purchase_order.delete()
             
             # Return a success response indicating the successful deletion.
             return Response({"message": "Purchase Order Successfully Deleted"}, status=status.HTTP_200_OK)
-        
+
+        except PurchaseOrder.DoesNotExist:
+            # The purchase order does not exist or its vendor is deleted and pending purge.
+            return Response({"error": "Purchase Order not found"}, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             # Handle any exceptions that may occur during the deletion process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -325,10 +524,12 @@ class PerformanceMetricsView(generics.GenericAPIView):
     Attributes:
         serializer_class (Serializer): The serializer class for handling vendor data.
         permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+        throttle_scope (str): The throttle scope holding the per-endpoint request quota.
     """
 
     serializer_class = VendorSerializer
     permission_classes = [IsAdminUser]
+    throttle_scope = "performance"
 
     def get_serializer_class(self):
         """
@@ -337,13 +538,10 @@ class PerformanceMetricsView(generics.GenericAPIView):
         Returns:
             Serializer: A serializer class with a subset of fields related to performance metrics.
         """
-        class PurchaseMetricsSerializer(self.serializer_class):
-            class Meta:
-                model = self.serializer_class.Meta.model
-                fields = ["on_time_delivery_rate", "quality_rating_avg", "average_response_time", "fulfillment_rate"]
-
-        return PurchaseMetricsSerializer
+        return PerformanceMetricsSerializer
 
+    @query_budget(max_queries=2, max_db_time=0.1)
+    @read_from_replica
     def get(self, request, *args, **kwargs):
         """
         Handle GET requests to retrieve performance metrics for a specific vendor.
@@ -372,6 +570,133 @@ class PerformanceMetricsView(generics.GenericAPIView):
             # Return a JSON response with the serialized data and a success status code.
             return Response(serializer.data, status=status.HTTP_200_OK)
 
+        except Vendor.DoesNotExist:
+            # The vendor does not exist or is deleted and pending purge.
+            return Response({"error": "Vendor not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            # Handle any exceptions that may occur during the retrieval process and return an error response.
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class PerformanceTrendView(generics.GenericAPIView):
+    """
+    PerformanceTrendView is a class-based view for retrieving the downsampled history of a vendor's performance metric.
+
+    Attributes:
+        permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+        throttle_scope (str): The throttle scope holding the per-endpoint request quota.
+        default_points (int): The number of points returned when the request does not specify it.
+        max_points (int): The maximum number of points a request may ask for.
+    """
+
+    permission_classes = [IsAdminUser]
+    throttle_scope = "performance"
+    default_points = 300
+    max_points = 2000
+
+    @query_budget(max_queries=4, max_db_time=2.0)
+    @read_from_replica
+    @limit_concurrency("trends")
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET requests to retrieve the history of a performance metric of a vendor.
+
+        Query parameters:
+            metric (str): The metric field (default "on_time_delivery_rate").
+            start (str): ISO 8601 date or datetime of the first snapshot included (default: the first one).
+            end (str): ISO 8601 date or datetime before which snapshots are included (default: the last one).
+            points (int): The maximum number of points returned (default 300).
+            method (str): The downsampling method used when the range holds more snapshots, "lttb" (default)
+                or "minmax".
+
+        Returns:
+            Response: A JSON response containing the number of snapshots in the range and the points.
+        """
+        vendor_id = kwargs.get("vendor_id")
+        metric = request.GET.get("metric", "on_time_delivery_rate")
+        method = request.GET.get("method", "lttb")
+        try:
+            points = int(request.GET.get("points", self.default_points))
+            start = self._parse_date(request.GET.get("start"))
+            end = self._parse_date(request.GET.get("end"))
+        except ValueError:
+            return Response({"error": "points must be an integer and start and end ISO 8601 dates"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if metric not in METRIC_FIELDS or method not in DOWNSAMPLING_METHODS or not 3 <= points <= self.max_points:
+            return Response({"error": f"metric must be one of {', '.join(METRIC_FIELDS)}, method one of "
+                                      f"{', '.join(DOWNSAMPLING_METHODS)} and points between 3 and {self.max_points}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if not Vendor.objects.filter(id=vendor_id).exists():
+                return Response({"error": "Vendor not found"}, status=status.HTTP_404_NOT_FOUND)
+
+            total, trend = get_performance_trend(vendor_id, metric, start, end, points, method)
+            to_representation = DateTimeField().to_representation
+            response_dict = {
+                "metric": metric,
+                "method": method if total > points else None,
+                "total": total,
+                "points": [{"date": to_representation(date), "value": value} for _, value, date in trend],
+            }
+            return Response(response_dict, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            # Handle any exceptions that may occur during the retrieval process and return an error response.
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _parse_date(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(value) or parse_date(value)
+        if parsed is None:
+            raise ValueError(value)
+        if not hasattr(parsed, "hour"):
+            parsed = datetime.combine(parsed, datetime.min.time())
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class VendorForecastView(generics.GenericAPIView):
+    """
+    VendorForecastView is a class-based view for retrieving the delivery forecast of a specific vendor.
+
+    Attributes:
+        serializer_class (Serializer): The serializer class for handling forecast data.
+        permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+        throttle_scope (str): The throttle scope holding the per-endpoint request quota.
+    """
+
+    serializer_class = VendorForecastSerializer
+    permission_classes = [IsAdminUser]
+    throttle_scope = "performance"
+
+    @query_budget(max_queries=2, max_db_time=0.1)
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET requests to retrieve the delivery forecast computed for a specific vendor.
+
+        Args:
+            request (Request): The incoming GET request.
+            *args: Variable-length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Response: A JSON response containing the forecast data or an error message.
+        """
+        try:
+            # Retrieve the forecast of the vendor ID from URL parameters.
+            vendor_id = kwargs.get("vendor_id")
+            forecast = VendorForecast.objects.filter(vendor_id=vendor_id, vendor__deleted_at__isnull=True).first()
+
+            if forecast is None:
+                # The forecast job has not processed any delivered purchase order of this vendor yet.
+                return Response({"error": "No forecast available for this vendor"}, status=status.HTTP_404_NOT_FOUND)
+
+            serializer = self.serializer_class(forecast)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
         except Exception as e:
             # Handle any exceptions that may occur during the retrieval process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -384,11 +709,14 @@ class AcknowledgePOView(generics.GenericAPIView):
     Attributes:
         serializer_class (Serializer): The serializer class for handling purchase order data.
         permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+        throttle_scope (str): The throttle scope holding the per-endpoint request quota.
     """
 
     serializer_class = PurchaseOrderSerializer
     permission_classes = [IsAdminUser]
+    throttle_scope = "purchase_orders"
 
+    @query_budget(max_queries=12, max_db_time=0.5)
     def post(self, request, *args, **kwargs):
         """
         Handle POST requests to update the acknowledgment status of a purchase order.
@@ -406,7 +734,7 @@ class AcknowledgePOView(generics.GenericAPIView):
             po_id = kwargs.get("po_id")
 
             # Retrieve the purchase order instance using the ID.
-            purchase_order = PurchaseOrder.objects.get(id=po_id)
+            purchase_order = PurchaseOrder.objects.get(id=po_id, vendor__deleted_at__isnull=True)
 
             # Update the acknowledgment date to the current time.
             purchase_order.acknowledgment_date = timezone.now()
@@ -414,18 +742,193 @@ class AcknowledgePOView(generics.GenericAPIView):
             if not purchase_order.status == "complete":
                 # If the purchase order status is not "complete," update it and save the changes.
                 purchase_order.status = "complete"
-                purchase_order.save()
+                with transaction.atomic():
+                    before = locked_counter_state(purchase_order)
+                    update_changed_fields(purchase_order, ["status", "acknowledgment_date"])
+                    update_po_counters(before, counter_state(purchase_order))
+                    record_change(purchase_order, "updated")
 
                 # Trigger the creation of performance metrics for the associated vendor.
-                create_performance_metrics(purchase_order.vendor)
+                update_performance_metrics(purchase_order.vendor)
 
                 # Return a success response.
                 return Response({"message": "Acknowledgment updated successfully"}, status=status.HTTP_200_OK)
 
             # If the purchase order is already acknowledged, return an error response.
             return Response({"error": "This Purchase Order is already acknowledged"}, status=status.HTTP_400_BAD_REQUEST)
+
+        except PurchaseOrder.DoesNotExist:
+            # The purchase order does not exist or its vendor is deleted and pending purge.
+            return Response({"error": "Purchase Order not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        except VersionConflict as e:
+            # Another request updated the purchase order since it was read.
+            return Response({"error": str(e)}, status=e.status_code)
             
         except Exception as e:
             # Handle any exceptions that may occur during the acknowledgment process and return an error response.
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
\ No newline at end of file
+
+
+class ChangeFeedView(generics.GenericAPIView):
+    """
+    ChangeFeedView is a class-based view for reading the change log of vendors and purchase orders.
+
+    Attributes:
+        serializer_class (Serializer): The serializer class for handling change events.
+        permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+        throttle_scope (str): The throttle scope holding the per-endpoint request quota.
+        max_limit (int): The maximum number of events returned by a single request.
+        max_wait (int): The maximum number of seconds a request may wait for new events, further capped by the
+            CHANGE_FEED_MAX_WAIT setting.
+    """
+
+    serializer_class = ChangeEventSerializer
+    permission_classes = [IsAdminUser]
+    throttle_scope = "changes"
+    max_limit = 1000
+    max_wait = 30
+
+    @query_budget(max_queries=int(max_wait / POLL_INTERVAL) + 2, max_db_time=1.0)
+    @limit_concurrency("long_poll")
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET requests to read the change events recorded after a cursor.
+
+        Query parameters:
+            since (int): Sequence number of the last consumed event (default 0).
+            limit (int): Maximum number of events to return (default 100).
+            wait (int): Seconds to long-poll for new events when none are available (default 0), when long
+                polling is enabled with CHANGE_FEED_MAX_WAIT.
+
+        Returns:
+            Response: A JSON response containing the events and the cursor for the next request.
+        """
+        try:
+            since = int(request.GET.get("since", 0))
+            limit = int(request.GET.get("limit", 100))
+            wait = int(request.GET.get("wait", 0))
+        except ValueError:
+            return Response({"error": "since, limit and wait must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if since < 0 or limit < 1 or wait < 0:
+            return Response({"error": "since and wait must not be negative, and limit must be at least 1"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, self.max_limit)
+        wait = min(wait, self.max_wait, settings.CHANGE_FEED_MAX_WAIT)
+
+        try:
+            events = read_changes(since, limit, wait)
+            serializer = self.serializer_class(events, many=True)
+            next_cursor = events[-1].id if events else since
+            return Response({"events": serializer.data, "next": next_cursor}, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            # Handle any exceptions that may occur during the retrieval process and return an error response.
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AdmissionStatsView(generics.GenericAPIView):
+    """
+    AdmissionStatsView is a class-based view for monitoring request admission control.
+
+    Attributes:
+        permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @query_budget(max_queries=0)
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET requests to retrieve the rejection counters of throttle scopes and concurrency pools.
+
+        Args:
+            request (Request): The incoming GET request.
+            *args: Variable-length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Response: A JSON response containing the rejection counters and the in-flight requests of this process.
+        """
+        scopes = api_settings.DEFAULT_THROTTLE_RATES.keys()
+        pools = settings.CONCURRENCY_LIMITS.keys()
+        response_dict = {
+            "throttled": get_rejection_counts(THROTTLE_COUNTER_PREFIX, scopes),
+            "shed": get_rejection_counts(SHED_COUNTER_PREFIX, pools),
+            "lock_timeouts": get_rejection_counts(LOCK_TIMEOUT_COUNTER_PREFIX, scopes),
+            "in_flight": {pool: ConcurrencyLimiter.get(pool).in_flight for pool in pools},
+        }
+        return Response(response_dict, status=status.HTTP_200_OK)
+
+
+class ProfileListView(generics.GenericAPIView):
+    """
+    ProfileListView is a class-based view for listing the request profiles stored by this worker process.
+
+    Attributes:
+        permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+        summary_fields (tuple): The profile fields included in the listing.
+    """
+
+    permission_classes = [IsAdminUser]
+    summary_fields = ("id", "method", "path", "status_code", "created_at", "duration", "samples", "sql_queries",
+                      "sql_time")
+
+    @query_budget(max_queries=0)
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET requests to list the stored request profiles, newest first.
+
+        Args:
+            request (Request): The incoming GET request.
+            *args: Variable-length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Response: A JSON response containing the profile summaries.
+        """
+        # Profiling is only needed by admin debugging requests, keep it off the worker import path.
+        from .profiling import get_profiles
+
+        profiles = [{field: profile[field] for field in self.summary_fields} for profile in get_profiles()]
+        return Response(profiles, status=status.HTTP_200_OK)
+
+
+class ProfileView(generics.GenericAPIView):
+    """
+    ProfileView is a class-based view for downloading a stored request profile.
+
+    Attributes:
+        permission_classes (list): The list of permission classes, allowing only admin users to access this view.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @query_budget(max_queries=0)
+    def get(self, request, *args, **kwargs):
+        """
+        Handle GET requests to retrieve a request profile with its SQL breakdown, or its collapsed stacks.
+
+        Args:
+            request (Request): The incoming GET request.
+            *args: Variable-length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Response: A JSON response containing the profile, or a text download of the collapsed stacks.
+        """
+        from .profiling import collapse_stacks, get_profile
+
+        profile = get_profile(kwargs.get("profile_id"))
+        if profile is None:
+            # Profiles live in the memory of the worker process that served the request and are evicted when
+            # the ring buffer is full.
+            return Response({"error": "Profile not found on this worker"}, status=status.HTTP_404_NOT_FOUND)
+
+        if kwargs.get("collapsed"):
+            response = HttpResponse(collapse_stacks(profile), content_type="text/plain; charset=utf-8")
+            response["Content-Disposition"] = f'attachment; filename="profile-{profile["id"]}.collapsed"'
+            return response
+
+        return Response({key: value for key, value in profile.items() if key != "stacks"}, status=status.HTTP_200_OK)
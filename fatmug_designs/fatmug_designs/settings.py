@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,12 +44,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'fatmug_app.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'fatmug_app.middleware.ReadPrimaryAfterWriteMiddleware',
+    'fatmug_app.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'fatmug_designs.urls'
@@ -79,9 +83,27 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Read replica of 'default'. Locally this is a copy of the SQLite file refreshed by the
+    # sync_sqlite_replica command.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['fatmug_app.db_router.ReplicaRouter']
+
+# Alias of the database serving the read-heavy endpoints, or None to read everything from 'default'.
+READ_REPLICA_DATABASE = None
+
+# After a write, the client reads from 'default' for this many seconds to see its own writes.
+READ_PRIMARY_COOKIE = 'read_primary'
+READ_PRIMARY_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -133,8 +155,80 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'fatmug_app.renderers.FastJSONRenderer',
+        # MessagePack is optional, like orjson and Brotli: it is only offered when msgpack is installed.
+        *(['fatmug_app.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'fatmug_app.throttling.UserTokenBucketThrottle',
+        'fatmug_app.throttling.ScopedTokenBucketThrottle',
+    ],
+    # Token bucket sizes: each client can burst up to N requests, refilled at N per period.
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '30/min',
+        'user': '600/min',
+        'admin_tokens': '10/min',
+        'vendors': '300/min',
+        'purchase_orders': '300/min',
+        'performance': '300/min',
+        'changes': '120/min',
+    },
 }
 
+# Maximum number of concurrent requests per worker process for expensive endpoints.
+# Requests beyond the limit are rejected with 503 instead of occupying every worker thread.
+CONCURRENCY_LIMITS = {
+    'listings': 4,
+    'long_poll': 8,
+    # Trend scans are long, so they get their own pool instead of taking the listings' slots.
+    'trends': 2,
+}
+
+# Throttle buckets and rejection counters are kept in the cache, which must be shared between
+# worker processes (e.g. Redis or Memcached) for quotas to apply across the whole deployment.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fatmug_designs',
+    }
+}
+
+# Longest wait, in seconds, of a long-poll request to the change feed (at most 30). A waiting request holds
+# its worker thread, so only enable long polling on threaded workers (e.g. gunicorn --threads) with more
+# threads than CONCURRENCY_LIMITS['long_poll']. With 0, requests return immediately and clients poll.
+CHANGE_FEED_MAX_WAIT = 0
+
+# How long a stored idempotent response can be replayed for the same Idempotency-Key, and how long a
+# request in progress holds its key before a retry may take it over (if the request died before committing).
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+IDEMPOTENCY_KEY_LEASE = timedelta(seconds=30)
+
+# Raise QueryBudgetExceeded when a view or the metric pipeline exceeds its query budget, instead of
+# logging a warning. The tests enable it with override_settings so that query regressions fail them.
+QUERY_BUDGET_RAISE = False
+
+# HistoricalPerformance snapshots are taken by the snapshot_performance scheduler once per interval
+# for every vendor whose metrics changed. Set PERFORMANCE_SNAPSHOTS_ON_WRITE to also record a
+# snapshot on every purchase order write, as before the scheduler existed.
+PERFORMANCE_SNAPSHOT_INTERVAL = timedelta(hours=1)
+PERFORMANCE_SNAPSHOTS_ON_WRITE = False
+
+# Request profiling: admin users can profile a request with the "X-Profile: 1" header, and
+# PROFILING_SAMPLE_RATE profiles that fraction of all requests. Each worker process keeps the
+# last PROFILING_BUFFER_SIZE profiles; stacks are sampled every PROFILING_INTERVAL seconds.
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_BUFFER_SIZE = 50
+PROFILING_INTERVAL = 0.005
+
+# Number of metric worker processes (run_metric_workers). With 0, performance metrics are recomputed
+# in the request thread handling each purchase order write; otherwise the update is queued for the
+# worker owning the vendor (vendor ID modulo METRIC_WORKERS). All web and worker processes must agree.
+METRIC_WORKERS = 0
+METRIC_WORKER_BATCH_SIZE = 500
+METRIC_WORKER_POLL_INTERVAL = 0.5
+
 
 # Configure settings for the Django Simple JWT library.
 SIMPLE_JWT = {
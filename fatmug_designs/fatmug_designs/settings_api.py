@@ -0,0 +1,39 @@
+"""
+API-only Django settings for fatmug_designs project.
+
+Extends the default settings for workers serving only the JWT-authenticated REST API. The admin site,
+sessions, messages and static files are left out, together with the middleware that only they need,
+so workers start faster and every API request skips that work.
+
+Select it with DJANGO_SETTINGS_MODULE=fatmug_designs.settings_api.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'fatmug_app',
+]
+
+# JWT authentication is handled by DRF, so neither session, CSRF, message nor clickjacking middleware
+# is needed; the API never renders HTML.
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'fatmug_app.middleware.CompressionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'fatmug_app.middleware.ReadPrimaryAfterWriteMiddleware',
+    'fatmug_app.middleware.ProfilingMiddleware',
+]
+
+ROOT_URLCONF = 'fatmug_designs.urls_api'
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    'DEFAULT_RENDERER_CLASSES': [
+        renderer for renderer in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']  # noqa: F405
+        if renderer != 'rest_framework.renderers.BrowsableAPIRenderer'
+    ],
+}
@@ -0,0 +1,8 @@
+# urls_api.py
+
+from django.urls import path, include
+
+urlpatterns = [
+    # Include app-specific URLs under the "api/" namespace, without the admin site.
+    path("api/", include("fatmug_app.urls")),
+]